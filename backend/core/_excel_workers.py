@@ -0,0 +1,61 @@
+"""
+Process pool for parsing the sheets of a workbook in parallel (ETL_EXCEL_READER=parallel)
+Kept free of app imports so spawned workers import nothing else from the app.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on worker processes used to parse one workbook
+MAX_PARSE_WORKERS = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_sheet(path: str, sheet_name: str) -> pd.DataFrame:
+    """Parse a single worksheet of a workbook on disk (runs in a worker process)"""
+    return pd.read_excel(path, sheet_name=sheet_name, engine="calamine")
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Reusable pool; spawned workers avoid forking the threaded API server"""
+    global _pool
+    if _pool is None:
+        workers = min(MAX_PARSE_WORKERS, os.cpu_count() or 1)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes, if any were started (called on API shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def parse_sheets_in_parallel(path: Path, sheet_names: List[str]) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Parse each sheet of a workbook on disk in its own worker process
+    Workers open the file themselves, so only the path is sent to them. Returns None
+    when a single process is all there is.
+    """
+    global _pool
+    if len(sheet_names) < 2 or (os.cpu_count() or 1) < 2:
+        return None
+    try:
+        pool = _get_pool()
+        futures = {name: pool.submit(_parse_sheet, str(path), name) for name in sheet_names}
+        return {name: future.result() for name, future in futures.items()}
+    except BrokenProcessPool as e:
+        logger.warning(f"Sheet parsing pool failed ({e}), parsing sequentially")
+        _pool = None
+        return None
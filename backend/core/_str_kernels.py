@@ -0,0 +1,117 @@
+"""
+Numba byte-level kernels for the hot string cleaning paths
+Only used for very large ASCII columns; callers fall back to pandas .str otherwise.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+# Columns with longer values are left to pandas to bound the padded byte matrix
+MAX_KERNEL_WIDTH = 256
+
+# Byte lookup tables: character class checks become a single table read
+_ALNUM_UPPER = np.zeros(256, dtype=np.uint8)
+for _c in b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    _ALNUM_UPPER[_c] = _c
+for _c in b"abcdefghijklmnopqrstuvwxyz":
+    _ALNUM_UPPER[_c] = _c - 32
+
+_QUOTE_PLUS_SPACE = np.zeros(256, dtype=np.uint8)
+for _c in b"'\"+ ":
+    _QUOTE_PLUS_SPACE[_c] = 1
+
+# Same set as str.strip() for ASCII input
+_WHITESPACE = np.zeros(256, dtype=np.uint8)
+for _c in b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f ":
+    _WHITESPACE[_c] = 1
+
+
+def _strip_non_alnum_upper(src, table):
+    """Uppercase each row and drop every byte outside [A-Z0-9]"""
+    out = np.zeros_like(src)
+    for i in prange(src.shape[0]):
+        k = 0
+        for j in range(src.shape[1]):
+            mapped = table[src[i, j]]
+            out[i, k] = mapped
+            k += mapped != 0
+    return out
+
+
+def _strip_quotes_plus_space(src, drop, whitespace):
+    """Drop quotes, plus signs and spaces from each row, then trim whitespace"""
+    out = np.zeros_like(src)
+    for i in prange(src.shape[0]):
+        k = 0
+        for j in range(src.shape[1]):
+            b = src[i, j]
+            if b == 0:
+                break
+            out[i, k] = b
+            k += 1 - drop[b]
+        # Leading/trailing whitespace (tabs, newlines) survives the regex; trim it like str.strip()
+        start = 0
+        while start < k and whitespace[out[i, start]]:
+            start += 1
+        end = k
+        while end > start and whitespace[out[i, end - 1]]:
+            end -= 1
+        for j in range(end - start):
+            out[i, j] = out[i, start + j]
+        for j in range(end - start, src.shape[1]):
+            out[i, j] = 0
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _strip_non_alnum_upper = njit(parallel=True, cache=True)(_strip_non_alnum_upper)
+    _strip_quotes_plus_space = njit(parallel=True, cache=True)(_strip_quotes_plus_space)
+
+
+def _to_byte_matrix(series: pd.Series) -> Optional[np.ndarray]:
+    """Encode a string series as a zero-padded uint8 matrix, or None if it is not plain ASCII"""
+    try:
+        encoded = series.astype('string').fillna('').to_numpy(dtype=object).astype('S')
+    except UnicodeEncodeError:
+        return None
+    width = encoded.dtype.itemsize
+    if width > MAX_KERNEL_WIDTH:
+        return None
+    return encoded.view(np.uint8).reshape(len(encoded), width)
+
+
+def _from_byte_matrix(matrix: np.ndarray, index: pd.Index) -> pd.Series:
+    """Decode a zero-padded uint8 matrix back into a string series"""
+    width = matrix.shape[1]
+    values = np.ascontiguousarray(matrix).view(f'S{width}').ravel().astype(str)
+    return pd.Series(values, index=index, dtype='string')
+
+
+def strip_non_alnum_upper(series: pd.Series) -> Optional[pd.Series]:
+    """Kernel equivalent of .str.upper().str.replace('[^A-Z0-9]', ''); None when not applicable"""
+    if not NUMBA_AVAILABLE or len(series) == 0:
+        return None
+    matrix = _to_byte_matrix(series)
+    if matrix is None:
+        return None
+    return _from_byte_matrix(_strip_non_alnum_upper(matrix, _ALNUM_UPPER), series.index)
+
+
+def strip_quotes_plus_space(series: pd.Series) -> Optional[pd.Series]:
+    """Kernel equivalent of .str.replace(r"['\\"+ ]+", '').str.strip(); None when not applicable"""
+    if not NUMBA_AVAILABLE or len(series) == 0:
+        return None
+    matrix = _to_byte_matrix(series)
+    if matrix is None:
+        return None
+    return _from_byte_matrix(_strip_quotes_plus_space(matrix, _QUOTE_PLUS_SPACE, _WHITESPACE), series.index)
@@ -3,11 +3,69 @@ Enhanced data cleaning functionality with better error handling
 """
 import pandas as pd
 import re
-from typing import Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, Any, Sequence
 import logging
 
+from ._str_kernels import strip_non_alnum_upper, strip_quotes_plus_space
+from .file_handler import _arrow_string_dtype
+
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used by the vectorized string cleaning below
+_PN_RE = re.compile(r"[^A-Z0-9]")
+_GENERIC_STRIP_RE = re.compile(r"['\"+ ]+")
+_GENERIC_STRIP_CHARS = ("'", '"', "+", " ")
+
+# Stringified missing values, blanked for display
+_NULL_STRINGS = ['nan', 'None', 'NaN']
+
+# Upper bound on threads used to clean string columns in parallel
+MAX_CLEANING_WORKERS = 8
+
+# Columns at least this long are routed through the Numba kernels when available
+KERNEL_MIN_ROWS = 200_000
+
+
+def _to_key_dtype(series: pd.Series) -> pd.Series:
+    """
+    Store a column as Arrow-backed strings, falling back to pandas strings
+    On Arrow storage .str.upper/.replace/.strip run as pyarrow.compute kernels (RE2 regex)
+    rather than per-element Python calls, which is the default 'string' storage on pandas 2.
+    """
+    try:
+        return series.astype('string[pyarrow]')
+    except ImportError:
+        return series.astype('string')
+
+
+def _clean_string_column(series: pd.Series) -> pd.Series:
+    """
+    Strip quotes, plus signs and spaces from a single string column
+    Stringified missing values are blanked in the same pass, so the result is already
+    what fix_arrow_compatibility would make of it.
+    """
+    if len(series) >= KERNEL_MIN_ROWS:
+        cleaned = strip_quotes_plus_space(series)
+        if cleaned is not None:
+            # Same storage as the Arrow path below, whether or not numba is installed
+            return _to_key_dtype(cleaned.mask(cleaned.isin(_NULL_STRINGS), ''))
+    series = _to_key_dtype(series).fillna('')
+    if series.dtype.storage == "pyarrow":
+        # The pattern is a plain character class: one literal replace per character
+        # avoids running the regex engine over every value
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        values = pa.array(series.array)
+        for char in _GENERIC_STRIP_CHARS:
+            values = pc.replace_substring(values, char, "")
+        values = pc.utf8_trim_whitespace(values)
+        values = pc.if_else(pc.is_in(values, value_set=pa.array(_NULL_STRINGS)), "", values)
+        return pd.Series(pd.arrays.ArrowStringArray(values), index=series.index)
+    cleaned = series.str.replace(_GENERIC_STRIP_RE, "", regex=True).str.strip()
+    return cleaned.mask(cleaned.isin(_NULL_STRINGS), '')
+
 
 class DataCleaner:
     """Handles data cleaning operations"""
@@ -16,9 +74,11 @@ class DataCleaner:
     def clean_master_yazaki(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         """
         Clean master YAZAKI data with detailed logging
+        The input frame is never mutated: columns are only ever replaced, never written
+        in place, so a shallow copy is enough and untouched columns are not duplicated.
         Returns: (cleaned_dataframe, cleaning_stats)
         """
-        df = df.copy()
+        df = df.copy(deep=False)
         stats = {
             "original_shape": df.shape,
             "columns_renamed": [],
@@ -33,6 +93,8 @@ class DataCleaner:
             df.rename(columns={old_name: 'YAZAKI PN'}, inplace=True)
             stats["columns_renamed"].append(f"{old_name} -> YAZAKI PN")
         
+        keep_rows = None
+
         # Clean ONLY YAZAKI PN column
         if 'YAZAKI PN' in df.columns:
             # Count nulls before cleaning
@@ -40,20 +102,30 @@ class DataCleaner:
             
             # Force conversion to string, handling all data types
             original_count = len(df)
-            df['YAZAKI PN'] = df['YAZAKI PN'].apply(
-                lambda x: str(x) if pd.notna(x) else ''
-            ).str.upper().str.replace(r"[^A-Z0-9]", "", regex=True)
+            cleaned = strip_non_alnum_upper(df['YAZAKI PN']) if original_count >= KERNEL_MIN_ROWS else None
+            if cleaned is None:
+                cleaned = (
+                    _to_key_dtype(df['YAZAKI PN']).fillna('')
+                    .str.upper().str.replace(_PN_RE, "", regex=True)
+                )
+            df['YAZAKI PN'] = cleaned
             
-            # Remove rows with empty YAZAKI PN after cleaning
-            df = df[df['YAZAKI PN'].str.len() > 0]
+            # Arrow strings speed up the isin/hash lookups on the key
+            df['YAZAKI PN'] = _to_key_dtype(df['YAZAKI PN'])
+
+            # Rows with empty YAZAKI PN after cleaning are removed below
+            keep_rows = df['YAZAKI PN'].str.len() > 0
+
+        # Fix data types for Arrow compatibility (in place: df is already our own shallow copy)
+        df = DataCleaner.fix_arrow_compatibility(df, copy=False)
+
+        if keep_rows is not None:
+            df = df[keep_rows]
             stats["rows_cleaned"] = original_count - len(df)
         
         stats["final_shape"] = df.shape
         logger.info(f"Master cleaning completed: {stats}")
 
-        # Fix data types for Arrow compatibility
-        df = DataCleaner.fix_arrow_compatibility(df)
-
         return df, stats
     
     @staticmethod
@@ -62,7 +134,7 @@ class DataCleaner:
         Clean generic sheet with detailed logging
         Returns: (cleaned_dataframe, cleaning_stats)
         """
-        df = df.copy()
+        df = df.copy(deep=False)
         stats = {
             "original_shape": df.shape,
             "columns_standardized": [],
@@ -85,27 +157,29 @@ class DataCleaner:
             stats["columns_swapped"] = True
         
         # Clean string values and ensure consistent types
-        string_columns = df.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            df[col] = df[col].apply(
-                lambda x: str(x) if pd.notna(x) else ''
-            ).apply(
-                lambda x: re.sub(r"['\"+ ]+", "", x).strip()
-            )
-            stats["string_columns_cleaned"] += 1
+        # Columns are independent, so clean them concurrently
+        string_columns = list(df.select_dtypes(include=['object', 'string']).columns)
+        if string_columns:
+            workers = min(MAX_CLEANING_WORKERS, len(string_columns))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                cleaned = list(executor.map(_clean_string_column, [df[col] for col in string_columns]))
+            for col, series in zip(string_columns, cleaned):
+                df[col] = series
+            stats["string_columns_cleaned"] = len(string_columns)
         
         stats["final_shape"] = df.shape
         logger.info(f"Generic cleaning completed: {stats}")
 
-        # Fix data types for Arrow compatibility
-        df = DataCleaner.fix_arrow_compatibility(df)
+        # Fix data types for Arrow compatibility (df is already our own copy); the
+        # cleaned string columns were made display-safe above and are not touched again
+        df = DataCleaner.fix_arrow_compatibility(df, copy=False, exclude=string_columns)
 
         return df, stats
     
     @staticmethod
     def prepare_target_sheet(df: pd.DataFrame) -> pd.DataFrame:
         """Prepare target sheet by ensuring YAZAKI PN is first column"""
-        df = df.copy()
+        df = df.copy(deep=False)
         cols = list(df.columns)
         
         # Rename YAZAKI_PN to YAZAKI PN if needed
@@ -115,37 +189,52 @@ class DataCleaner:
         
         # Move YAZAKI PN to first position
         if "YAZAKI PN" in cols:
+            df["YAZAKI PN"] = _to_key_dtype(df["YAZAKI PN"])
             cols.insert(0, cols.pop(cols.index("YAZAKI PN")))
             df = df[cols]
         
         return df
 
     @staticmethod
-    def fix_arrow_compatibility(df: pd.DataFrame) -> pd.DataFrame:
+    def fix_arrow_compatibility(df: pd.DataFrame, copy: bool = True, exclude: Sequence = ()) -> pd.DataFrame:
         """
         Fix DataFrame data types to prevent PyArrow serialization errors in Streamlit
+        Pass copy=False to convert a frame the caller already owns in place, and
+        exclude to skip columns the caller has already made display-safe.
         """
-        df = df.copy()
-
-        for col in df.columns:
-            # Convert all object columns to string to avoid mixed type issues
-            if df[col].dtype == 'object':
-                # Handle mixed types by converting everything to string
-                df[col] = df[col].astype(str)
-                # Replace 'nan' strings with empty strings for cleaner display
-                df[col] = df[col].replace(['nan', 'None', 'NaN'], '')
-
-            # Handle numeric columns that might have mixed types
-            elif df[col].dtype in ['int64', 'float64']:
-                # Ensure numeric columns are properly typed
-                try:
-                    # Try to convert to numeric, coercing errors to NaN
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    # Fill NaN with 0 for display purposes
-                    df[col] = df[col].fillna(0)
-                except:
-                    # If conversion fails, convert to string
-                    df[col] = df[col].astype(str)
+        if copy:
+            # Columns are replaced rather than written in place, so a shallow copy suffices
+            df = df.copy(deep=False)
+
+        # Dtypes are read once and each group of columns is converted in a single pass
+        object_cols, string_cols, float_cols = [], [], []
+        skipped = set(exclude)
+        for col, dtype in df.dtypes.items():
+            if col in skipped:
+                continue
+            if dtype == 'object':
+                object_cols.append(col)
+            elif isinstance(dtype, pd.StringDtype):
+                string_cols.append(col)
+            # Numeric columns are already properly typed; only floats can hold NaN
+            elif dtype == 'float64':
+                float_cols.append(col)
+
+        # Convert all object columns to string to avoid mixed type issues, then replace
+        # 'nan' strings with empty strings for cleaner display; the result is stored as
+        # Arrow-backed strings like the loaded sheets (already the case for 'str' on pandas 3)
+        if object_cols:
+            converted = df[object_cols].astype(str).replace(_NULL_STRINGS, '')
+            arrow_dtype = _arrow_string_dtype()
+            df[object_cols] = converted.astype(arrow_dtype) if arrow_dtype is not None else converted
+
+        # Arrow-backed text columns are already strings; only blank out their missing values
+        if string_cols:
+            df[string_cols] = df[string_cols].fillna('').replace(_NULL_STRINGS, '')
+
+        # Fill NaN with 0 for display purposes
+        if float_cols:
+            df[float_cols] = df[float_cols].fillna(0)
 
         logger.info("DataFrame types fixed for Arrow compatibility")
         return df
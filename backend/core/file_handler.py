@@ -1,17 +1,111 @@
 """
 Enhanced file handling with better error handling and validation
 """
+import numpy as np
 import pandas as pd
 import io
+import hashlib
 import logging
-from typing import Dict, List, Union
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
 import uuid
 import os
+from collections import OrderedDict
 from pathlib import Path
 
+from ._excel_workers import parse_sheets_in_parallel
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# CSVs above this size are parsed in chunks to bound peak memory
+LARGE_CSV_BYTES = 50 * 1024 * 1024
+CSV_CHUNK_SIZE = 256_000
+
+# Uploads are streamed to disk in blocks of this size instead of being read into memory whole
+UPLOAD_BLOCK_SIZE = 1 << 20
+
+# Parsed uploads kept in memory by content hash, so re-uploading the same bytes skips parsing
+PARSED_CACHE_MAX_FILES = 4
+
+# Compression used for the on-disk cache of cleaned sheets
+CLEANED_CACHE_COMPRESSION = "zstd"
+
+# Part of every cleaned-sheet cache name: a digest of the cleaning code, so cached
+# sheets from an earlier version of it are never served after an upgrade
+_CLEANING_SOURCES = ("cleaning.py", "_str_kernels.py")
+CLEANED_CACHE_VERSION = hashlib.sha256(
+    b"".join((Path(__file__).parent / name).read_bytes() for name in _CLEANING_SOURCES)
+).hexdigest()[:12]
+
+# Set ETL_EXCEL_READER=calamine to build Excel sheets straight from python-calamine rows,
+# skipping pandas' per-cell text parser (numbers, dates and blanks are typed per column),
+# or ETL_EXCEL_READER=parallel to parse the sheets of uploads saved to disk in one worker
+# process per sheet (multi-core hosts only)
+EXCEL_READER = os.getenv("ETL_EXCEL_READER", "pandas")
+
+
+def _parser_input(source: Union[bytes, Path]):
+    """Parser argument for in-memory bytes or a file on disk"""
+    return io.BytesIO(source) if isinstance(source, bytes) else str(source)
+
+
+def _source_size(source: Union[bytes, Path]) -> int:
+    """Size in bytes of in-memory bytes or a file on disk"""
+    return len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+
+def _arrow_string_dtype():
+    """Arrow-backed string dtype with NaN missing values, or None if unsupported"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)  # pandas >= 2.3
+    except TypeError:
+        try:
+            return pd.StringDtype("pyarrow_numpy")  # pandas 2.1 - 2.2
+        except (TypeError, ValueError):
+            return None
+
+
+def open_excel(path: Union[str, Path]) -> pd.ExcelFile:
+    """Open a workbook with the calamine reader, falling back to the default engine"""
+    try:
+        return pd.ExcelFile(path, engine="calamine")
+    except (ImportError, ValueError) as e:
+        logger.debug(f"calamine engine unavailable ({e}), falling back to default Excel engine")
+        return pd.ExcelFile(path)
+
+
+def dataframe_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    df.to_dict('records') with naive datetime columns pre-rendered as ISO strings
+    Formatting runs once per column in Arrow's strftime kernel instead of one isoformat()
+    call per cell at JSON-encoding time. Columns with sub-second values are left as is.
+    """
+    datetime_positions = [
+        i for i, dtype in enumerate(df.dtypes)
+        if dtype.kind == 'M' and getattr(dtype, 'tz', None) is None
+    ]
+    if datetime_positions:
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError:
+            return df.to_dict('records')
+
+        df = df.copy(deep=False)
+        for i in datetime_positions:
+            try:
+                # Safe cast fails on sub-second values, which isoformat() would print
+                seconds = pa.array(df.iloc[:, i]).cast(pa.timestamp('s'))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            formatted = pc.strftime(seconds, format='%Y-%m-%dT%H:%M:%S')
+            df.isetitem(i, pd.Series(formatted.to_numpy(zero_copy_only=False), index=df.index, dtype=object))
+    return df.to_dict('records')
+
 
 class FileManager:
     """Manages uploaded files and their processing"""
@@ -20,6 +114,9 @@ class FileManager:
         self.files_storage = {}  # In-memory storage for demo
         self.upload_dir = Path("uploads")
         self.upload_dir.mkdir(exist_ok=True)
+        self.cache_dir = self.upload_dir / "cache"
+        self.cache_dir.mkdir(exist_ok=True)
+        self.parsed_cache = OrderedDict()  # (content hash, extension) -> parsed sheets, LRU order
         self._load_existing_files()
     
     def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
@@ -34,18 +131,45 @@ class FileManager:
         with open(file_path, "wb") as f:
             f.write(file_content)
 
-        # Load and store sheets in memory for quick access
+        content_hash = hashlib.sha256(file_content).hexdigest()
+        return self._register_upload(file_id, filename, file_path, content_hash, file_content)
+
+    def save_uploaded_stream(self, stream: BinaryIO, filename: str) -> str:
+        """Save an uploaded file from a stream and return file ID
+
+        The upload is copied to disk block by block and parsed from there, so the raw
+        payload is never held in memory next to the parsed sheets.
+        """
+        self._cleanup_old_files()
+
+        file_id = str(uuid.uuid4())
+        file_path = self.upload_dir / f"{file_id}_{filename}"
+        digest = hashlib.sha256()
         try:
-            sheets = self._load_file_from_bytes(file_content, filename)
+            with open(file_path, "wb") as f:
+                while block := stream.read(UPLOAD_BLOCK_SIZE):
+                    digest.update(block)
+                    f.write(block)
+        except Exception:
+            if file_path.exists():
+                file_path.unlink()
+            raise
 
-            # Auto-fix column names (especially Yazaki PN → YAZAKI PN)
-            sheets = self._auto_fix_column_names(sheets)
+        return self._register_upload(file_id, filename, file_path, digest.hexdigest(), file_path)
+
+    def _register_upload(self, file_id: str, filename: str, file_path: Path, content_hash: str,
+                         source: Union[bytes, Path]) -> str:
+        """Parse a saved upload and store its sheets in memory"""
+        # Load and store sheets in memory for quick access
+        try:
+            sheets = self._parse_upload(source, filename, content_hash)
 
             self.files_storage[file_id] = {
                 "filename": filename,
                 "file_path": str(file_path),
                 "sheets": sheets,
                 "processed_sheets": {},
+                "content_hash": content_hash,
                 "upload_time": pd.Timestamp.now()  # Track upload time for cleanup
             }
 
@@ -57,15 +181,131 @@ class FileManager:
                 file_path.unlink()
             raise e
     
-    def _load_file_from_bytes(self, file_content: bytes, filename: str) -> Dict[str, pd.DataFrame]:
-        """Load file from bytes and return sheets dictionary"""
+    def _parse_upload(self, source: Union[bytes, Path], filename: str, content_hash: str) -> Dict[str, pd.DataFrame]:
+        """Parse an upload, reusing the sheets of an identical earlier upload when cached"""
+        key = (content_hash, Path(filename).suffix.lower())
+        sheets = self.parsed_cache.get(key)
+        if sheets is None:
+            sheets = self._load_file(source, filename)
+
+            # Auto-fix column names (especially Yazaki PN → YAZAKI PN)
+            sheets = self._auto_fix_column_names(sheets)
+
+            self.parsed_cache[key] = sheets
+            while len(self.parsed_cache) > PARSED_CACHE_MAX_FILES:
+                self.parsed_cache.popitem(last=False)
+        else:
+            self.parsed_cache.move_to_end(key)
+            logger.info(f"Reusing parsed sheets of an identical upload: {filename}")
+
+        # Raw sheets are read-only (get_sheet copies them for callers that mutate), so
+        # uploads of the same content share the cached frames
+        return dict(sheets)
+
+    def _load_file(self, source: Union[bytes, Path], filename: str) -> Dict[str, pd.DataFrame]:
+        """Load file from bytes or a path on disk and return sheets dictionary"""
         if filename.lower().endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(file_content))
-            return {"Sheet1": df}
+            sheets = {"Sheet1": self._read_csv(source)}
+        else:
+            # For Excel files: parse all sheets in one pass with the Rust calamine reader
+            try:
+                if EXCEL_READER == "calamine":
+                    return self._use_arrow_strings(self._read_excel_calamine(source))
+                sheets = None
+                if EXCEL_READER == "parallel" and not isinstance(source, bytes):
+                    with pd.ExcelFile(source, engine="calamine") as xl:
+                        sheet_names = xl.sheet_names
+                    sheets = parse_sheets_in_parallel(source, sheet_names)
+                if sheets is None:
+                    sheets = pd.read_excel(_parser_input(source), sheet_name=None, engine="calamine")
+            except (ImportError, ValueError) as e:
+                logger.debug(f"calamine engine unavailable ({e}), falling back to default Excel engine")
+                xl = pd.ExcelFile(_parser_input(source))
+                sheets = {name: xl.parse(name) for name in xl.sheet_names}
+        
+        return self._use_arrow_strings(sheets)
+
+    def _read_excel_calamine(self, source: Union[bytes, Path]) -> Dict[str, pd.DataFrame]:
+        """Read every sheet directly from python-calamine rows (first row is the header)"""
+        from python_calamine import CalamineWorkbook
+
+        if isinstance(source, bytes):
+            workbook = CalamineWorkbook.from_filelike(io.BytesIO(source))
+        else:
+            workbook = CalamineWorkbook.from_path(str(source))
+        sheets = {}
+        for name in workbook.sheet_names:
+            rows = workbook.get_sheet_by_name(name).to_python(skip_empty_area=True)
+            if not rows:
+                sheets[name] = pd.DataFrame()
+                continue
+
+            header = []
+            for i, value in enumerate(rows[0]):
+                label = str(value) if value != "" else f"Unnamed: {i}"
+                # Same de-duplication as read_excel: A, A.1, A.2, ...
+                base, n = label, 1
+                while label in header:
+                    label, n = f"{base}.{n}", n + 1
+                header.append(label)
+
+            # calamine rows are rectangular: one object matrix for the whole sheet, sliced per
+            # column, instead of gathering every column from the row lists in Python
+            cells = np.array(rows[1:], dtype=object).reshape(len(rows) - 1, len(header))
+            cells[cells == ""] = np.nan  # Blank cells
+            columns = {}
+            for i, label in enumerate(header):
+                col = pd.Series(cells[:, i], dtype=object).infer_objects()
+                # calamine returns every number as float; whole numbers become ints like read_excel
+                if col.dtype == np.float64:
+                    if len(col) and not col.isna().any() and (col % 1 == 0).all():
+                        col = col.astype(np.int64)
+                elif col.dtype == object:
+                    kind = pd.api.types.infer_dtype(col, skipna=True)
+                    if kind in ("date", "datetime"):
+                        col = pd.to_datetime(col)
+                    elif kind.startswith("mixed"):
+                        col = pd.Series(
+                            [int(v) if isinstance(v, float) and v.is_integer() else v for v in col],
+                            dtype=object
+                        )
+                columns[label] = col
+            sheets[name] = pd.DataFrame(columns)
+        return sheets
+
+    def _use_arrow_strings(self, sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Store pure-text object columns as Arrow-backed strings (pandas 3 'str' semantics)"""
+        dtype = _arrow_string_dtype()
+        if dtype is None:
+            return sheets
         
-        # For Excel files
-        xl = pd.ExcelFile(io.BytesIO(file_content))
-        return {name: xl.parse(name) for name in xl.sheet_names}
+        for df in sheets.values():
+            self._to_arrow_strings(df, dtype)
+        return sheets
+
+    @staticmethod
+    def _to_arrow_strings(df: pd.DataFrame, dtype) -> pd.DataFrame:
+        """Convert the pure-text object columns of one frame in place"""
+        for col in df.columns[df.dtypes == object]:
+            column = df[col]
+            # Mixed columns (e.g. 'X' and 0 in a status column) stay object to keep their values
+            if pd.api.types.infer_dtype(column, skipna=True) == "string":
+                df[col] = column.astype(dtype)
+        return df
+
+    def _read_csv(self, source: Union[bytes, Path]) -> pd.DataFrame:
+        """Parse CSV bytes or a CSV file, streaming large files in fixed-size chunks"""
+        if _source_size(source) > LARGE_CSV_BYTES:
+            reader = pd.read_csv(_parser_input(source), chunksize=CSV_CHUNK_SIZE)
+            dtype = _arrow_string_dtype()
+            # Move each chunk's text into Arrow buffers as it arrives, so at most one
+            # chunk of Python string objects is alive at a time
+            chunks = [self._to_arrow_strings(chunk, dtype) if dtype is not None else chunk for chunk in reader]
+            logger.info(f"Large CSV parsed in {len(chunks)} chunks of {CSV_CHUNK_SIZE} rows")
+            return pd.concat(chunks, ignore_index=True)
+
+        # Same C parser (and type inference) as the chunked path above
+        return pd.read_csv(_parser_input(source))
 
     def _auto_fix_column_names(self, sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """Auto-fix common column name issues"""
@@ -116,8 +356,8 @@ class FileManager:
             raise ValueError(f"File ID {file_id} not found")
         return list(self.files_storage[file_id]["sheets"].keys())
     
-    def get_sheet(self, file_id: str, sheet_name: str) -> pd.DataFrame:
-        """Get a specific sheet"""
+    def get_sheet(self, file_id: str, sheet_name: str, copy: bool = True) -> pd.DataFrame:
+        """Get a specific sheet (pass copy=False when the caller does not mutate it)"""
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
@@ -125,34 +365,115 @@ class FileManager:
         if sheet_name not in sheets:
             raise ValueError(f"Sheet {sheet_name} not found")
         
-        return sheets[sheet_name].copy()
+        return sheets[sheet_name].copy() if copy else sheets[sheet_name]
     
-    def update_sheet(self, file_id: str, sheet_name: str, dataframe: pd.DataFrame):
-        """Update a sheet with processed data"""
+    def update_sheet(self, file_id: str, sheet_name: str, dataframe: pd.DataFrame, copy: bool = True):
+        """Update a sheet with processed data (pass copy=False to hand over a frame the caller no longer uses)"""
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
-        self.files_storage[file_id]["processed_sheets"][sheet_name] = dataframe.copy()
+        self.files_storage[file_id]["processed_sheets"][sheet_name] = dataframe.copy() if copy else dataframe
+        
+        # Anything derived from the previous version of this sheet is stale now
+        sheet_cache = self.files_storage[file_id].get("sheet_cache", {})
+        for cache_key in [k for k in sheet_cache if k[0] == sheet_name]:
+            del sheet_cache[cache_key]
     
-    def get_processed_sheet(self, file_id: str, sheet_name: str) -> pd.DataFrame:
+    def get_processed_sheet(self, file_id: str, sheet_name: str, copy: bool = True) -> pd.DataFrame:
         """Get processed sheet if available, otherwise return original"""
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
         processed = self.files_storage[file_id]["processed_sheets"]
         if sheet_name in processed:
-            return processed[sheet_name].copy()
+            return processed[sheet_name].copy() if copy else processed[sheet_name]
         
-        return self.get_sheet(file_id, sheet_name)
+        return self.get_sheet(file_id, sheet_name, copy=copy)
     
+    def get_sheet_derived(
+        self, file_id: str, sheet_name: str, key: tuple, build: Callable[[pd.DataFrame], Any]
+    ) -> Any:
+        """Return a value derived from a sheet, computing build(sheet) once until the sheet changes"""
+        if file_id not in self.files_storage:
+            raise ValueError(f"File ID {file_id} not found")
+        
+        sheet_cache = self.files_storage[file_id].setdefault("sheet_cache", {})
+        cache_key = (sheet_name,) + key
+        if cache_key in sheet_cache:
+            logger.debug(f"Reusing cached {key[0]} for sheet {sheet_name}")
+        else:
+            sheet = self.get_processed_sheet(file_id, sheet_name, copy=False)
+            sheet_cache[cache_key] = build(sheet)
+        return sheet_cache[cache_key]
+
+    def get_lookup_table(
+        self, file_id: str, sheet_name: str, key_col: str, lookup_col: str,
+        build: Callable[[pd.DataFrame, str, str], Any]
+    ) -> Any:
+        """Return the cached lookup table for a sheet, building it with build() on first use"""
+        return self.get_sheet_derived(
+            file_id, sheet_name, ("lookup_table", key_col, lookup_col),
+            lambda sheet: build(sheet, key_col, lookup_col)
+        )
+
+    def _cleaned_sheet_path(self, file_id: str, sheet_name: str, role: str) -> Optional[Path]:
+        """Parquet cache path for a cleaned sheet, keyed on the uploaded file's content hash"""
+        content_hash = self.files_storage.get(file_id, {}).get("content_hash")
+        if not content_hash:
+            return None
+        return self.cache_dir / f"{content_hash}_{CLEANED_CACHE_VERSION}_{role}_{sheet_name}.parquet"
+
+    def load_cleaned_sheet(self, file_id: str, sheet_name: str, role: str) -> Optional[pd.DataFrame]:
+        """Load a previously cleaned sheet from the parquet cache, if present"""
+        path = self._cleaned_sheet_path(file_id, sheet_name, role)
+        if path is None or not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path, engine="pyarrow")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cleaned-sheet cache {path.name}: {e}")
+            return None
+
+    def save_cleaned_sheet(self, file_id: str, sheet_name: str, role: str, dataframe: pd.DataFrame):
+        """Persist a cleaned sheet so the same upload is not cleaned again"""
+        path = self._cleaned_sheet_path(file_id, sheet_name, role)
+        if path is None:
+            return
+        try:
+            dataframe.to_parquet(path, engine="pyarrow", compression=CLEANED_CACHE_COMPRESSION)
+        except Exception as e:
+            # Caching is best effort (e.g. non-string column names are not valid parquet)
+            logger.warning(f"Could not cache cleaned sheet '{sheet_name}': {e}")
+            if path.exists():
+                path.unlink()
+
+    def _release_content(self, content_hash: Optional[str]):
+        """Drop an upload's parsed sheets and cached cleaned sheets once no stored file has its content"""
+        if not content_hash or any(
+            info.get("content_hash") == content_hash for info in self.files_storage.values()
+        ):
+            return
+        for key in [key for key in self.parsed_cache if key[0] == content_hash]:
+            del self.parsed_cache[key]
+        for cached in self.cache_dir.glob(f"{content_hash}_*.parquet"):
+            cached.unlink(missing_ok=True)
+
+    def _prune_cleaned_cache(self):
+        """Delete cached cleaned sheets of files no longer stored or of older cleaning code"""
+        live_hashes = {info.get("content_hash") for info in self.files_storage.values()}
+        for cached in self.cache_dir.glob("*.parquet"):
+            content_hash, _, rest = cached.name.partition("_")
+            if content_hash not in live_hashes or not rest.startswith(f"{CLEANED_CACHE_VERSION}_"):
+                cached.unlink(missing_ok=True)
+
     def preview_sheets(self, file_id: str, sheet_names: List[str], rows: int = 5) -> Dict[str, List[Dict]]:
         """Get preview of multiple sheets"""
         previews = {}
         for sheet_name in sheet_names:
-            df = self.get_sheet(file_id, sheet_name)
+            df = self.get_sheet(file_id, sheet_name, copy=False)
             # Fill NaN values with empty strings to avoid JSON serialization issues
             df_preview = df.head(rows).fillna('')
-            previews[sheet_name] = df_preview.to_dict('records')
+            previews[sheet_name] = dataframe_records(df_preview)
         return previews
     
     def cleanup_file(self, file_id: str):
@@ -161,7 +482,8 @@ class FileManager:
             file_path = Path(self.files_storage[file_id]["file_path"])
             if file_path.exists():
                 file_path.unlink()
-            del self.files_storage[file_id]
+            content_hash = self.files_storage.pop(file_id).get("content_hash")
+            self._release_content(content_hash)
 
     def _cleanup_old_files(self, max_files: int = 5, max_age_hours: int = 24):
         """Clean up old files from memory to optimize performance"""
@@ -205,8 +527,9 @@ class FileManager:
         if file_id in self.files_storage:
             file_info = self.files_storage[file_id]
 
-            # Remove from memory
+            # Remove from memory, together with its parsed and cached cleaned sheets
             del self.files_storage[file_id]
+            self._release_content(file_info.get("content_hash"))
 
             # Optionally remove from disk (uncomment if needed)
             # file_path = Path(file_info["file_path"])
@@ -219,6 +542,9 @@ class FileManager:
         """Clear all cached files for performance optimization"""
         file_count = len(self.files_storage)
         self.files_storage.clear()
+        self.parsed_cache.clear()
+        for cached in self.cache_dir.glob("*.parquet"):
+            cached.unlink()
         logger.info(f"Cleared all {file_count} files from cache for performance optimization")
 
     def _load_existing_files(self):
@@ -233,11 +559,14 @@ class FileManager:
                         file_id, original_filename = filename_parts
 
                         try:
-                            # Load the file
+                            # Hash the file block by block; it is parsed straight from disk if needed
+                            digest = hashlib.sha256()
                             with open(file_path, 'rb') as f:
-                                file_content = f.read()
+                                while block := f.read(UPLOAD_BLOCK_SIZE):
+                                    digest.update(block)
 
-                            sheets = self._load_file_from_bytes(file_content, original_filename)
+                            content_hash = digest.hexdigest()
+                            sheets = self._load_file(file_path, original_filename)
                             sheets = self._auto_fix_column_names(sheets)
 
                             self.files_storage[file_id] = {
@@ -245,6 +574,7 @@ class FileManager:
                                 "file_path": str(file_path),
                                 "sheets": sheets,
                                 "processed_sheets": {},
+                                "content_hash": content_hash,
                                 "upload_time": pd.Timestamp.fromtimestamp(file_path.stat().st_mtime)
                             }
 
@@ -254,6 +584,7 @@ class FileManager:
                             logger.warning(f"Failed to load existing file {file_path}: {e}")
 
             logger.info(f"Loaded {len(self.files_storage)} existing files from upload directory")
+            self._prune_cleaned_cache()
 
         except Exception as e:
             logger.error(f"Error loading existing files: {e}")
@@ -1,6 +1,7 @@
 """
 Master BOM update functionality based on activation status
 """
+import numpy as np
 import pandas as pd
 from typing import Tuple, Dict, Any, List
 import logging
@@ -27,6 +28,8 @@ class MasterBOMUpdater:
         - 0: Check for duplicates, insert if not duplicate
         - NOT_FOUND: Insert as new record
         
+        The master is copied once here; the target is only read, never copied.
+        
         Returns: (updated_master_df, update_stats)
         """
         
@@ -38,17 +41,39 @@ class MasterBOMUpdater:
             "duplicates": []
         }
         
-        # Work with copies
+        # Only the master is mutated, so only the master is copied
         updated_master = master_df.copy()
-        processed_target = target_df.copy()
+        processed_target = target_df
+
+        # New rows are collected here and appended in a single concat at the end
+        pending_inserts: List[Dict[str, Any]] = []
+        # Blank row shared by every insert; copied per record
+        record_template = {col: '' for col in updated_master.columns}
         
         # Ensure ACTIVATION_STATUS column exists
         if 'ACTIVATION_STATUS' not in processed_target.columns:
             raise ValueError("Target data must have ACTIVATION_STATUS column")
         
+        # Dictionary-encode master and target keys in one hashing pass so every key
+        # probe below compares integer codes instead of strings (-1 = missing key)
+        key_codes, key_uniques = pd.factorize(
+            pd.concat([updated_master[key_column], processed_target[key_column]], ignore_index=True)
+        )
+        master_codes = key_codes[:len(updated_master)]
+        target_codes = pd.Series(key_codes[len(updated_master):], index=processed_target.index)
+        
+        # Index the master once for all status branches: an array aligned on the key codes
+        # holding the position of each key's first master row (-1 if absent). The extra
+        # last slot is what a missing key (code -1) reads, so probes are plain array gathers.
+        master_key_index = np.full(len(key_uniques) + 1, -1, dtype=np.intp)
+        present_codes, first_positions = np.unique(master_codes, return_index=True)
+        keep = present_codes >= 0
+        master_key_index[present_codes[keep]] = first_positions[keep]
+        
         # Process each status type
         for status in ['X', 'D', '0', 'NOT_FOUND']:
-            status_records = processed_target[processed_target['ACTIVATION_STATUS'] == status]
+            status_mask = processed_target['ACTIVATION_STATUS'] == status
+            status_records = processed_target[status_mask]
             
             if len(status_records) == 0:
                 continue
@@ -62,14 +87,15 @@ class MasterBOMUpdater:
             elif status == 'D':
                 # Update existing records in Master BOM
                 updated_count = MasterBOMUpdater._update_existing_records(
-                    updated_master, status_records, lookup_column, key_column
+                    updated_master, target_codes[status_mask], lookup_column, master_key_index
                 )
                 stats["updated_count"] += updated_count
                 
             elif status == '0':
                 # Check for duplicates, insert if not duplicate
                 duplicates, inserted_count = MasterBOMUpdater._handle_zero_status(
-                    updated_master, status_records, key_column
+                    updated_master, status_records, target_codes[status_mask], key_column,
+                    master_key_index, pending_inserts, record_template
                 )
                 stats["duplicates"].extend(duplicates)
                 stats["duplicates_count"] += len(duplicates)
@@ -78,9 +104,15 @@ class MasterBOMUpdater:
             elif status == 'NOT_FOUND':
                 # Insert as new records
                 inserted_count = MasterBOMUpdater._insert_new_records(
-                    updated_master, status_records, key_column
+                    status_records, key_column, pending_inserts, record_template
                 )
                 stats["inserted_count"] += inserted_count
+
+        if pending_inserts:
+            updated_master = pd.concat(
+                [updated_master, pd.DataFrame(pending_inserts, columns=updated_master.columns)],
+                ignore_index=True
+            )
         
         logger.info(f"Master BOM update completed: {stats}")
         return updated_master, stats
@@ -88,93 +120,107 @@ class MasterBOMUpdater:
     @staticmethod
     def _update_existing_records(
         master_df: pd.DataFrame,
-        records_to_update: pd.DataFrame,
+        key_codes: pd.Series,
         lookup_column: str,
-        key_column: str
+        master_key_index: np.ndarray
     ) -> int:
         """Update existing records in Master BOM where status is 'D'"""
-        updated_count = 0
+        positions = master_key_index[key_codes.to_numpy()]
+        found = positions >= 0
         
-        for _, record in records_to_update.iterrows():
-            yazaki_pn = record[key_column]
-            
-            # Find matching record in master
-            mask = master_df[key_column] == yazaki_pn
-            matching_indices = master_df[mask].index
-            
-            if len(matching_indices) > 0:
-                # Update the lookup column value
-                master_df.loc[matching_indices[0], lookup_column] = 'D'
-                updated_count += 1
-                logger.debug(f"Updated {yazaki_pn} with status 'D'")
+        # Only the first master row per key is updated, as before
+        rows = np.unique(positions[found])
+        if len(rows):
+            master_df.loc[master_df.index[rows], lookup_column] = 'D'
+        logger.debug(f"Updated {len(rows)} master records with status 'D'")
         
-        return updated_count
+        return int(found.sum())
     
     @staticmethod
     def _handle_zero_status(
         master_df: pd.DataFrame,
         records_to_check: pd.DataFrame,
-        key_column: str
+        key_codes: pd.Series,
+        key_column: str,
+        master_key_index: np.ndarray,
+        pending_inserts: List[Dict[str, Any]],
+        record_template: Dict[str, Any]
     ) -> Tuple[List[Dict], int]:
         """Handle records with status '0' - check for duplicates"""
         duplicates = []
         inserted_count = 0
-        
-        for _, record in records_to_check.iterrows():
+        # Records inserted earlier in this batch count as existing for later records
+        pending_by_code: Dict[int, Dict[str, Any]] = {}
+        # Duplicates of existing master rows get their Master_Record filled in one pass below
+        master_duplicate_rows: List[int] = []
+        master_duplicate_infos: List[Dict[str, Any]] = []
+        
+        # Materialize all target rows at once instead of one Series per iterrows() step
+        master_positions = master_key_index[key_codes.to_numpy()].tolist()
+        for code, master_position, record in zip(
+            key_codes.tolist(), master_positions, records_to_check.to_dict('records')
+        ):
             yazaki_pn = record[key_column]
             
-            # Check if already exists in master
-            existing_records = master_df[master_df[key_column] == yazaki_pn]
-            
-            if len(existing_records) > 0:
+            # Check if already exists in master (missing keys never match)
+            if code >= 0 and (master_position >= 0 or code in pending_by_code):
                 # Found duplicate - add to duplicates list
                 duplicate_info = {
                     "YAZAKI_PN": yazaki_pn,
                     "Source": "Target Sheet",
                     "Existing_In_Master": True,
-                    "Master_Record": existing_records.iloc[0].to_dict(),
-                    "Target_Record": record.to_dict()
+                    "Master_Record": None,
+                    "Target_Record": record
                 }
+                if master_position >= 0:
+                    master_duplicate_rows.append(master_position)
+                    master_duplicate_infos.append(duplicate_info)
+                else:
+                    duplicate_info["Master_Record"] = dict(pending_by_code[code])
                 duplicates.append(duplicate_info)
             else:
                 # No duplicate found - insert as new record
-                new_record = MasterBOMUpdater._prepare_new_record(record, master_df)
-                master_df.loc[len(master_df)] = new_record
+                new_record = MasterBOMUpdater._prepare_new_record(record, record_template)
+                pending_inserts.append(new_record)
+                pending_by_code[code] = new_record
                 inserted_count += 1
-                logger.debug(f"Inserted new record for {yazaki_pn}")
         
+        if master_duplicate_rows:
+            master_records = master_df.iloc[master_duplicate_rows].to_dict('records')
+            for duplicate_info, master_record in zip(master_duplicate_infos, master_records):
+                duplicate_info["Master_Record"] = master_record
+        
+        logger.debug(f"Inserted {inserted_count} new records, found {len(duplicates)} duplicates")
         return duplicates, inserted_count
     
     @staticmethod
     def _insert_new_records(
-        master_df: pd.DataFrame,
         records_to_insert: pd.DataFrame,
-        key_column: str
+        key_column: str,
+        pending_inserts: List[Dict[str, Any]],
+        record_template: Dict[str, Any]
     ) -> int:
         """Insert new records for NOT_FOUND status"""
         inserted_count = 0
         
-        for _, record in records_to_insert.iterrows():
-            new_record = MasterBOMUpdater._prepare_new_record(record, master_df)
-            master_df.loc[len(master_df)] = new_record
+        for record in records_to_insert.to_dict('records'):
+            new_record = MasterBOMUpdater._prepare_new_record(record, record_template)
+            pending_inserts.append(new_record)
             inserted_count += 1
-            logger.debug(f"Inserted NOT_FOUND record for {record[key_column]}")
         
+        logger.debug(f"Inserted {inserted_count} NOT_FOUND records")
         return inserted_count
     
     @staticmethod
-    def _prepare_new_record(source_record: pd.Series, master_df: pd.DataFrame) -> pd.Series:
+    def _prepare_new_record(source_record: Dict[str, Any], record_template: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare a new record for insertion into Master BOM"""
-        # Create a new record with the same structure as master
-        new_record = pd.Series(index=master_df.columns, dtype=object)
-        
-        # Fill with default values
-        new_record = new_record.fillna('')
+        # Start from the blank master-shaped template
+        new_record = record_template.copy()
         
         # Copy available data from source record
-        for col in source_record.index:
-            if col in new_record.index and col != 'ACTIVATION_STATUS':
-                new_record[col] = source_record[col]
+        for col, value in source_record.items():
+            if col in new_record and col != 'ACTIVATION_STATUS':
+                new_record[col] = value
         
         return new_record
 
@@ -1,13 +1,154 @@
 """
 Enhanced preprocessing functionality with better column suggestion and lookup
 """
+import os
+import sys
+import numpy as np
 import pandas as pd
 from difflib import SequenceMatcher
-from typing import Tuple, Dict, Any
+from functools import lru_cache
+from typing import Tuple, Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Target sheets at least this long are joined with Polars when it is installed
+# (set ETL_ENGINE=polars to use it for every lookup)
+POLARS_MIN_ROWS = 500_000
+
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+
+@lru_cache(maxsize=256)
+def _upper_columns(columns: Tuple[str, ...]) -> np.ndarray:
+    """Upper-cased array of a column list, computed once per list"""
+    return np.char.upper(np.array(columns, dtype=str))
+
+
+@lru_cache(maxsize=256)
+def _lowercase_columns(columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Lower-cased, interned column names, computed once per list"""
+    return tuple(sys.intern(str(col).lower()) for col in columns)
+
+
+@lru_cache(maxsize=256)
+def _lowercase_column_map(columns: Tuple[str, ...]) -> Dict[str, str]:
+    """Lower-cased name -> first column with that name, for O(1) case-insensitive matches"""
+    mapping: Dict[str, str] = {}
+    for col, col_lower in zip(columns, _lowercase_columns(columns)):
+        mapping.setdefault(col_lower, col)
+    return mapping
+
+
+def _best_similarity(
+    input_lower: str,
+    candidates: List[str],
+    candidates_lower: List[str],
+    score_cutoff: float = 0.0
+) -> Tuple[str, float]:
+    """
+    Return the first highest-scoring candidate and its 0-1 similarity against the lower-cased names
+    With RapidFuzz the score is the normalized Indel (LCS) similarity, which is never below
+    difflib's ratio() and can exceed it on weak matches, so the two back-ends may suggest
+    different columns there (pinned in tests/test_preprocessing.py).
+    """
+    if not candidates:
+        return "", 0.0
+    if RAPIDFUZZ_AVAILABLE:
+        # One C-level scan over all candidates; extractOne skips candidates below the
+        # cutoff cheaply and stops at the first perfect score
+        result = fuzz_process.extractOne(
+            input_lower, candidates_lower, scorer=fuzz.ratio, processor=None,
+            score_cutoff=score_cutoff * 100
+        )
+        if result is None:
+            return "", 0.0
+        _, score, index = result
+        return candidates[index], score / 100
+    best, best_score = "", 0.0
+    for col, col_lower in zip(candidates, candidates_lower):
+        matcher = SequenceMatcher(None, input_lower, col_lower)
+        # Cheap upper bounds first: skip candidates that cannot beat the best or reach the cutoff
+        floor = max(best_score, score_cutoff - 1e-9)
+        if matcher.real_quick_ratio() <= floor or matcher.quick_ratio() <= floor:
+            continue
+        score = matcher.ratio()
+        if score > best_score and score >= score_cutoff:
+            best, best_score = col, score
+            if best_score >= 1.0:
+                break  # Nothing can beat a perfect match
+    return best, best_score
+
+
+def _is_arrow_backed(series: pd.Series) -> bool:
+    """True when the series is stored in Arrow memory (string[pyarrow] or ArrowDtype)"""
+    return isinstance(series.dtype, pd.ArrowDtype) or getattr(series.dtype, "storage", None) == "pyarrow"
+
+
+def _lookup_positions_polars(lookup_keys: pd.Series, target_keys: pd.Series) -> Optional[np.ndarray]:
+    """Multi-threaded Polars left join of target keys onto lookup positions; None if unavailable"""
+    try:
+        import polars as pl
+    except ImportError:
+        return None
+    try:
+        master = pl.LazyFrame({
+            "_key": pl.from_pandas(lookup_keys.reset_index(drop=True)),
+            "_pos": np.arange(len(lookup_keys), dtype=np.int64)
+        })
+        target = pl.LazyFrame({"_key": pl.from_pandas(target_keys.reset_index(drop=True))}).with_row_index("_row")
+        # One lazy plan (join, order restore, null fill) executed in a single collect.
+        # Null keys never join; master keys are unique so the join cannot add rows.
+        positions = (
+            target.join(master, on="_key", how="left")
+            .sort("_row")
+            .select(pl.col("_pos").fill_null(-1))
+            .collect()
+        )
+        return positions["_pos"].to_numpy().astype(np.intp)
+    except Exception as e:
+        # e.g. mismatched key dtypes, which Polars refuses to join
+        logger.debug(f"Polars lookup unavailable ({e}), using pandas/Arrow")
+        return None
+
+
+def _lookup_positions(lookup_keys: pd.Series, target_keys: pd.Series) -> np.ndarray:
+    """Position of each target key among the unique lookup keys, -1 where absent"""
+    if os.getenv("ETL_ENGINE") == "polars" or len(target_keys) >= POLARS_MIN_ROWS:
+        positions = _lookup_positions_polars(lookup_keys, target_keys)
+        if positions is not None:
+            return positions
+
+    if _is_arrow_backed(lookup_keys) and _is_arrow_backed(target_keys):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        try:
+            # Arrow hash join: keys are never materialized as Python objects
+            value_set = pa.array(lookup_keys)
+            probe = pa.array(target_keys)
+            if probe.type != value_set.type:
+                probe = probe.cast(value_set.type)
+            positions = pc.index_in(probe, value_set=value_set)
+            return pc.fill_null(positions, -1).to_numpy(zero_copy_only=False).astype(np.intp)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            logger.debug(f"Arrow key probe failed ({e}), using pandas index")
+
+    # Probe each distinct target key once, then gather by integer code (-1 = null key)
+    if isinstance(target_keys.dtype, pd.CategoricalDtype):
+        codes, uniques = target_keys.cat.codes.to_numpy(), target_keys.cat.categories
+    else:
+        codes, uniques = pd.factorize(target_keys)
+    if isinstance(lookup_keys.dtype, pd.CategoricalDtype):
+        # Avoid the CategoricalIndex get_indexer path
+        lookup_keys = lookup_keys.astype(lookup_keys.cat.categories.dtype)
+    unique_positions = np.append(pd.Index(lookup_keys).get_indexer(uniques), -1)
+    return unique_positions[codes]
+
 
 class DataProcessor:
     """Handles data preprocessing and lookup operations"""
@@ -18,119 +159,187 @@ class DataProcessor:
         Suggest best matching column with confidence score
         Returns: (suggested_column, confidence_score)
         """
+        return DataProcessor._suggest_column_cached(input_name, tuple(columns))
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _suggest_column_cached(input_name: str, columns: Tuple[str, ...]) -> Tuple[str, float]:
+        """Memoized implementation of suggest_column (columns passed as a tuple)"""
         if not input_name.strip():
             return columns[0] if columns else "", 0.0
         
+        # Exact matches need no similarity scoring
+        if input_name in columns:
+            return input_name, 1.0
+        input_lower = input_name.lower()
+        columns_lower = _lowercase_columns(columns)
+        case_match = _lowercase_column_map(columns).get(input_lower)
+        if case_match is not None:
+            return case_match, 1.0
+        
         # Extract prefix and suffix from input (e.g., J74_V710_B2_PP_YOTK -> J74_V710_B2, YOTK)
         parts = input_name.split('_')
         if len(parts) >= 4:
             prefix = '_'.join(parts[:3])  # First 3 parts
             suffix = parts[-1]  # Last part
             
-            best, best_score = input_name, 0
-            for col in columns:
-                # Check if column starts with prefix and ends with suffix
-                if col.upper().startswith(prefix.upper()) and col.upper().endswith(suffix.upper()):
-                    score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
-                    if score >= 0.9 and score > best_score:  # 90% threshold
-                        best, best_score = col, score
-            
-            if best_score > 0:
+            # Check if column starts with prefix and ends with suffix, for all columns at once
+            columns_upper = _upper_columns(columns)
+            mask = (
+                np.char.startswith(columns_upper, prefix.upper())
+                & np.char.endswith(columns_upper, suffix.upper())
+            )
+            hits = np.flatnonzero(mask)
+            best, best_score = _best_similarity(
+                input_lower, [columns[i] for i in hits], [columns_lower[i] for i in hits], score_cutoff=0.9
+            )
+            if best_score >= 0.9:  # 90% threshold
                 return best, best_score
         
         # Fallback to similarity matching
-        best, best_score = input_name, 0
-        for col in columns:
-            score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
-            if score > best_score:
-                best, best_score = col, score
-        
+        best, best_score = _best_similarity(input_lower, list(columns), list(columns_lower))
+        if best_score <= 0:
+            return input_name, 0
         return best, best_score
     
+    @staticmethod
+    def build_lookup_table(
+        master_df: pd.DataFrame,
+        key_col: str,
+        lookup_col: str,
+        target_keys: Optional[pd.Series] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the reusable master side of a LOCKUP (unique keys and their values)
+        The result can be cached and passed to add_activation_status for repeated lookups.
+        Pass target_keys to keep only the master rows that one target can hit (not cacheable).
+        """
+        master_records = len(master_df)
+        unique_records = None
+
+        # Only the key and lookup columns are needed: filter and deduplicate just those
+        master_df = master_df[list(dict.fromkeys([key_col, lookup_col]))]
+
+        if target_keys is not None:
+            wanted = pd.unique(target_keys.dropna())
+            # Narrow target: drop master rows it can never hit before deduplicating,
+            # so the table that gets probed stays small
+            if len(wanted) * 2 < master_records:
+                unique_records = master_df[key_col].nunique(dropna=False)
+                master_df = master_df[master_df[key_col].isin(wanted)]
+
+        # Remove duplicates from master (filtering keeps every row of a kept key, so 'first' is unchanged)
+        master_clean = master_df.drop_duplicates(subset=[key_col], keep='first')
+        if unique_records is None:
+            unique_records = len(master_clean)
+
+        # Lookup keys over the unique master keys (null keys can never be looked up);
+        # mask the two columns directly instead of filtering the whole frame
+        master_keys = master_clean[key_col]
+        has_key = master_keys.notna().to_numpy()
+        return {
+            "key_col": key_col,
+            "lookup_col": lookup_col,
+            "master_records": master_records,
+            "master_unique_records": unique_records,
+            "keys": master_keys[has_key],
+            # Trailing None is what a failed probe (position -1) reads
+            "values": np.append(master_clean[lookup_col].to_numpy(dtype=object)[has_key], None)
+        }
+    
     @staticmethod
     def add_activation_status(
         master_df: pd.DataFrame,
         target_df: pd.DataFrame,
         key_col: str,
-        lookup_col: str
+        lookup_col: str,
+        lookup_table: Optional[Dict[str, Any]] = None
     ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         """
         Add activation status with detailed statistics and logging
+        Pass a lookup_table from build_lookup_table to skip rebuilding the master side.
         Returns: (result_dataframe, lookup_stats)
         """
         logger.info("🔍 Starting LOCKUP process...")
         logger.info(f"📊 Input data: Master BOM ({len(master_df)} records), Target sheet ({len(target_df)} records)")
         logger.info(f"🔑 Key column: '{key_col}', Lookup column: '{lookup_col}'")
 
-        # Remove duplicates from master
-        master_clean = master_df.drop_duplicates(subset=[key_col], keep='first')
-        duplicates_removed = len(master_df) - len(master_clean)
+        if lookup_table is None:
+            lookup_table = DataProcessor.build_lookup_table(master_df, key_col, lookup_col, target_df[key_col])
+        lookup_keys = lookup_table["keys"]
+        lookup_values = lookup_table["values"]
+        unique_records = lookup_table["master_unique_records"]
+
+        duplicates_removed = lookup_table["master_records"] - unique_records
         if duplicates_removed > 0:
             logger.info(f"🧹 Removed {duplicates_removed} duplicate records from Master BOM")
 
-        # Prepare lookup dictionary
-        lookup_series = master_clean[lookup_col]
-        lookup_dict = pd.Series(lookup_series.values, index=master_clean[key_col]).to_dict()
-
-        logger.info(f"📋 Created lookup dictionary with {len(lookup_dict)} unique mappings")
+        logger.info(f"📋 Created lookup table with {unique_records} unique mappings")
 
         stats = {
-            "master_records": len(master_df),
-            "master_unique_records": len(master_clean),
+            "master_records": lookup_table["master_records"],
+            "master_unique_records": unique_records,
             "target_records": len(target_df),
-            "lookup_dict_size": len(lookup_dict),
+            "lookup_dict_size": unique_records,
             "duplicates_removed": duplicates_removed,
             "mapping_results": {},
             "detailed_log": []
         }
         
-        df = target_df.copy()
+        # Shallow copy: inserting ACTIVATION_STATUS below never touches the caller's frame,
+        # and no column data is duplicated
+        df = target_df.copy(deep=False)
+
+        logger.info("🔄 Starting LOCKUP mapping process...")
 
-        # Enhanced status mapping with detailed logging
-        def get_status(key):
+        # One hash probe per target key (Arrow-native when both key columns are Arrow strings)
+        positions = _lookup_positions(lookup_keys, df[key_col])
+        found = positions >= 0
+        values = lookup_values[positions]
+        key_missing = df[key_col].isna().to_numpy()
+
+        # Status precedence: missing key > not found > found with null value > found value
+        status = np.where(
+            key_missing, "MISSING_KEY",
+            np.where(~found, "NOT_FOUND", np.where(pd.isna(values), "0", values))
+        )
+
+        df.insert(1, 'ACTIVATION_STATUS', status)
+
+        # Detailed log for the first 50 records only
+        for key, val, is_found in zip(df[key_col].head(50), values[:50], found[:50]):
             if pd.isna(key):
                 stats["detailed_log"].append(f"⚠️ Missing key in target record")
-                return "MISSING_KEY"  # Key is missing/null in target
-            elif key in lookup_dict:
-                val = lookup_dict[key]
-                if pd.notna(val):
-                    stats["detailed_log"].append(f"✅ Found '{key}' → '{val}'")
-                    return val
-                else:
-                    stats["detailed_log"].append(f"⚠️ Found '{key}' but value is null → '0'")
-                    return "0"  # Found key, but value is null
-            else:
+            elif not is_found:
                 stats["detailed_log"].append(f"❌ Key '{key}' not found in Master BOM → 'NOT_FOUND'")
-                return "NOT_FOUND"  # Key not found in master
-
-        logger.info("🔄 Starting LOCKUP mapping process...")
-
-        # Apply custom mapping logic
-        df.insert(1, 'ACTIVATION_STATUS', df[key_col].apply(get_status))
+            elif pd.notna(val):
+                stats["detailed_log"].append(f"✅ Found '{key}' → '{val}'")
+            else:
+                stats["detailed_log"].append(f"⚠️ Found '{key}' but value is null → '0'")
 
         logger.info("✅ LOCKUP mapping completed")
 
-        # Calculate mapping statistics
-        status_counts = df['ACTIVATION_STATUS'].value_counts().to_dict()
-        stats["mapping_results"] = status_counts
-        stats["total_processed"] = len(df)
+        # Calculate mapping statistics in one hash pass over the status array
+        # (most frequent first, ties in order of first appearance, as value_counts)
+        total = len(df)
+        codes, labels = pd.factorize(status)
+        counts = np.bincount(codes, minlength=len(labels))
+        order = np.argsort(-counts, kind='stable')
+        labels, counts = labels[order].tolist(), counts[order].tolist()
+        percentages = [round(p, 2) for p in (np.asarray(counts) / max(total, 1) * 100).tolist()]
+
+        stats["mapping_results"] = dict(zip(labels, counts))
+        stats["total_processed"] = total
+        stats["mapping_percentages"] = dict(zip(labels, percentages))
 
         # Log detailed results
         logger.info("📊 LOCKUP Results Summary:")
-        for status, count in status_counts.items():
-            percentage = round((count / len(df)) * 100, 2)
-            logger.info(f"   {status}: {count} records ({percentage}%)")
+        for label, count, percentage in zip(labels, counts, percentages):
+            logger.info(f"   {label}: {count} records ({percentage}%)")
 
-        # Limit detailed log to first 50 entries for performance
-        if len(stats["detailed_log"]) > 50:
-            stats["detailed_log"] = stats["detailed_log"][:50] + [f"... and {len(stats['detailed_log']) - 50} more entries"]
-        
-        # Calculate percentages
-        total = len(df)
-        stats["mapping_percentages"] = {
-            status: round((count / total) * 100, 2) 
-            for status, count in status_counts.items()
-        }
+        # Detailed log is limited to first 50 entries for performance
+        if total > 50:
+            stats["detailed_log"].append(f"... and {total - 50} more entries")
         
         logger.info(f"Lookup completed: {stats}")
         
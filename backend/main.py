@@ -3,13 +3,15 @@ FastAPI backend for ETL Automation Tool
 """
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import io
 import os
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 from .config import settings
 from .models import (
@@ -21,11 +23,12 @@ from .models import (
     SharePointUploadResponse, SharePointRollbackRequest, SharePointRollbackResponse,
     ProcessingPreviewRequest, ProcessingPreviewResponse, ErrorResponse
 )
-from .core.file_handler import file_manager
+from .core.file_handler import file_manager, dataframe_records, open_excel
 from .core.cleaning import data_cleaner
 from .core.preprocessing import data_processor
 from .core.master_updater import master_updater
 from .core.log_manager import log_manager, setup_log_capture
+from .core._excel_workers import shutdown_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +37,17 @@ logger = logging.getLogger(__name__)
 # Setup log capture for export functionality
 setup_log_capture()
 
+# Cells serialized per block when streaming CSV downloads; matches to_csv's own internal
+# chunk size, which formats datetime columns chunk by chunk
+CSV_DOWNLOAD_CHUNK_CELLS = 100_000
+
+# Download formats: media type and file extension
+DOWNLOAD_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
 # Simple session storage (in production, use Redis or database)
 session_storage = {}
 
@@ -72,11 +86,197 @@ def get_session_data():
 
     return session_data
 
+def status_distribution(value_counts: pd.Series) -> Dict[str, int]:
+    """Bucket a value_counts(dropna=False) result into X / D / 0 / OTHER counts"""
+    distribution = {
+        "X": int(value_counts.get("X", 0)),
+        "D": int(value_counts.get("D", 0)),
+        "0": int(value_counts.get("0", 0)) + int(value_counts.get(0, 0)),  # Handle both string and numeric 0
+        "OTHER": 0
+    }
+
+    # Everything else, including NaN/empty, counts as OTHER
+    for value, count in value_counts.items():
+        if str(value) not in ["X", "D", "0"]:
+            distribution["OTHER"] += int(count)
+
+    return distribution
+
+def stripped_strings(series: pd.Series) -> pd.Series:
+    """Values as stripped strings; text columns are stripped in place of a round trip through astype(str)"""
+    # Text with NaN semantics (how loaded sheets are stored) stays on its storage: astype(str)
+    # would materialize Python strings on pandas 2; NA-semantics strings would give NA comparisons
+    if isinstance(series.dtype, pd.StringDtype) and series.dtype.na_value is not pd.NA:
+        return series.str.strip()
+    return series.astype(str).str.strip()
+
+def compact_copy(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Copy of a frame with its low-cardinality text columns stored as categoricals
+    Returns the copy and the original dtypes of the converted columns (restore with astype).
+    """
+    compact = df.copy()
+    original_dtypes = {}
+    for col, dtype in df.dtypes.items():
+        column = df[col]
+        # Text, or text mixed with plain ints (statuses such as 'X', 'D' and 0); categories
+        # would merge equal values of other types, such as True, 1 and 1.0
+        kind = pd.api.types.infer_dtype(column, skipna=True)
+        if kind == "mixed-integer":
+            if not column.dropna().map(type).isin([str, int]).all():
+                continue
+        elif kind != "string":
+            continue
+        if column.nunique() * 2 < len(column):
+            compact[col] = column.astype("category")
+            original_dtypes[col] = dtype
+    return compact, original_dtypes
+
+def column_profile(df: pd.DataFrame) -> Dict[str, Any]:
+    """Per-sheet column statistics behind /column-insights (cached until the sheet changes)"""
+    has_key = "YAZAKI PN" in df.columns
+    # One null scan per column serves both the key's null count and the completeness figures
+    non_null = df.notna().sum()
+    return {
+        "total_columns": int(len(df.columns)),
+        "total_rows": int(len(df)),
+        "yazaki_pn_column": has_key,
+        "yazaki_pn_unique_count": int(df["YAZAKI PN"].nunique()) if has_key else 0,
+        "yazaki_pn_null_count": int(len(df) - non_null["YAZAKI PN"]) if has_key else 0,
+        "column_types": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "sample_data": dataframe_records(df.head(3).fillna('')),
+        "completeness": {col: float(val) for col, val in ((non_null / len(df)) * 100).round(2).items()},
+    }
+
+def activation_summary(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """Activation status counts behind /lookup-insights; None when the sheet has no status column"""
+    # Check for activation status column (could be different names); the first match is used
+    activation_columns = [col for col in df.columns if 'activation' in col.lower() or 'status' in col.lower()]
+    if not activation_columns:
+        return None
+    activation_counts = df[activation_columns[0]].value_counts()
+    return {
+        "total_records": int(len(df)),
+        # Convert numpy types to Python types for JSON serialization
+        "activation_counts": {str(k): int(v) for k, v in activation_counts.items()},
+    }
+
+# /bom/analysis fields: (output key, sheet column, default when the column is missing, conversion)
+BOM_RECORD_FIELDS = [
+    ("part_number", "Part Number", "", str),
+    ("description", "Description", "", str),
+    ("category", "Category", "Unknown", str),
+    ("status", "Status", "NOT_FOUND", str),
+    ("quantity", "Quantity", 0, int),
+    ("unit_cost", "Unit Cost", 0, float),
+    ("total_cost", "Total Cost", 0, float),
+    ("supplier", "Supplier", "Unknown", str),
+    ("last_updated", "Last Updated", "", str),
+    ("criticality", "Criticality", "Medium", str),
+]
+
+def bom_records(master_bom: pd.DataFrame) -> List[Dict[str, Any]]:
+    """BOM rows for /bom/analysis, converted a column at a time instead of one iterrows() Series per row"""
+    fields = {}
+    for key, column, default, convert in BOM_RECORD_FIELDS:
+        if column in master_bom.columns:
+            fields[key] = master_bom[column].astype(object).map(convert)
+        else:
+            fields[key] = pd.Series(convert(default), index=master_bom.index, dtype=object)
+    return pd.DataFrame(fields, index=master_bom.index).to_dict("records")
+
+def _json_default(value: Any) -> Any:
+    """JSON value for a pandas/numpy scalar the encoders cannot handle natively"""
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def json_safe(value: Any) -> Any:
+    """Raw cell values (numpy scalars, Timestamps, NaT) inside dicts/lists converted to JSON-native values"""
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_safe(item) for item in value]
+    if value is None or type(value) in (str, int, float, bool):
+        return value
+    return _json_default(value)
+
+def default_response_class() -> type:
+    """ORJSONResponse when orjson is installed (C encoder, NaN -> null), else FastAPI's JSONResponse"""
+    try:
+        import orjson  # noqa: F401
+        from fastapi.responses import ORJSONResponse
+        return ORJSONResponse
+    except ImportError:
+        return JSONResponse
+
+def dataframe_to_csv_bytes(df: pd.DataFrame, include_header: bool = True) -> bytes:
+    """Serialize a DataFrame with to_csv straight into UTF-8 bytes (no intermediate str)"""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, header=include_header, encoding="utf-8")
+    return buffer.getvalue()
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_cells: int = CSV_DOWNLOAD_CHUNK_CELLS) -> Iterator[bytes]:
+    """
+    Yield a DataFrame as CSV bytes one row block at a time (header only in the first block)
+    Blocks line up with the chunks df.to_csv() formats internally, so the joined
+    output is byte-identical to a single to_csv call.
+    """
+    if len(df) == 0:
+        yield dataframe_to_csv_bytes(df)
+        return
+    chunk_rows = max(chunk_cells // max(len(df.columns), 1), 1)
+    for start in range(0, len(df), chunk_rows):
+        yield dataframe_to_csv_bytes(df.iloc[start:start + chunk_rows], include_header=start == 0)
+
+def dataframe_to_columnar_bytes(df: pd.DataFrame, file_format: str) -> bytes:
+    """Serialize a DataFrame to Parquet (zstd) or Arrow IPC file bytes"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+def clean_master_and_target(file_id: str, master_sheet: str, target_sheet: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Clean master and target sheets, reusing the parquet cache for an identical upload"""
+    master_cleaned = file_manager.load_cleaned_sheet(file_id, master_sheet, "master")
+    if master_cleaned is None:
+        # Get original sheet (the cleaners copy before mutating)
+        master_df = file_manager.get_sheet(file_id, master_sheet, copy=False)
+        # Clean master sheet (YAZAKI PN only)
+        master_cleaned, _ = data_cleaner.clean_master_yazaki(master_df)
+        file_manager.save_cleaned_sheet(file_id, master_sheet, "master", master_cleaned)
+    else:
+        logger.info(f"Using cached cleaned master sheet: {master_sheet}")
+
+    target_cleaned = file_manager.load_cleaned_sheet(file_id, target_sheet, "target")
+    if target_cleaned is None:
+        target_df = file_manager.get_sheet(file_id, target_sheet, copy=False)
+        # Clean target sheet
+        target_cleaned, _ = data_cleaner.clean_generic_sheet(target_df)
+        target_cleaned = data_cleaner.prepare_target_sheet(target_cleaned)
+        file_manager.save_cleaned_sheet(file_id, target_sheet, "target", target_cleaned)
+    else:
+        logger.info(f"Using cached cleaned target sheet: {target_sheet}")
+
+    return master_cleaned, target_cleaned
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.api_title,
     description=settings.api_description,
-    version=settings.api_version
+    version=settings.api_version,
+    default_response_class=default_response_class()
 )
 
 # Add CORS middleware
@@ -89,6 +289,12 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+def stop_sheet_parsing_pool():
+    """Stop the sheet parsing worker processes so reloads and restarts leave none behind"""
+    shutdown_pool()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -117,11 +323,8 @@ async def upload_file(file: UploadFile = File(...)):
                 detail="Only CSV and Excel files are supported"
             )
 
-        # Read file content
-        content = await file.read()
-
-        # Save file and get ID
-        file_id = file_manager.save_uploaded_file(content, file.filename)
+        # Stream the spooled upload to disk and parse it from there
+        file_id = file_manager.save_uploaded_stream(file.file, file.filename)
 
         # Get sheet names
         sheet_names = file_manager.get_sheet_names(file_id)
@@ -171,16 +374,10 @@ async def preview_sheets(request: SheetPreviewRequest):
 async def clean_data(request: CleaningRequest):
     """Clean master and target sheets"""
     try:
-        # Get original sheets
-        master_df = file_manager.get_sheet(request.file_id, request.master_sheet)
-        target_df = file_manager.get_sheet(request.file_id, request.target_sheet)
-        
-        # Clean master sheet (YAZAKI PN only)
-        master_cleaned, master_stats = data_cleaner.clean_master_yazaki(master_df)
-        
-        # Clean target sheet
-        target_cleaned, target_stats = data_cleaner.clean_generic_sheet(target_df)
-        target_cleaned = data_cleaner.prepare_target_sheet(target_cleaned)
+        # Cleaning is CPU-bound pandas work: keep it off the event loop
+        master_cleaned, target_cleaned = await run_in_threadpool(
+            clean_master_and_target, request.file_id, request.master_sheet, request.target_sheet
+        )
         
         # Store cleaned data
         file_manager.update_sheet(request.file_id, request.master_sheet, master_cleaned)
@@ -189,10 +386,14 @@ async def clean_data(request: CleaningRequest):
         return CleaningResponse(
             success=True,
             message="Data cleaning completed successfully",
-            master_preview=master_cleaned[["YAZAKI PN"]].head(5).to_dict('records'),
-            target_preview=target_cleaned.head(5).to_dict('records'),
+            master_preview=dataframe_records(master_cleaned[["YAZAKI PN"]].head(5)),
+            target_preview=dataframe_records(target_cleaned.head(5)),
             master_shape=list(master_cleaned.shape),
-            target_shape=list(target_cleaned.shape)
+            target_shape=list(target_cleaned.shape),
+            # Sent along so the client needs no separate /columns request after cleaning
+            master_lookup_columns=file_manager.get_sheet_derived(
+                request.file_id, request.master_sheet, ("lookup_columns",), data_processor.get_column_suggestions
+            )
         )
         
     except ValueError as e:
@@ -225,8 +426,10 @@ async def suggest_column(request: ColumnSuggestionRequest):
 async def get_lookup_columns(file_id: str, sheet_name: str):
     """Get available columns for lookup from master sheet"""
     try:
-        master_df = file_manager.get_processed_sheet(file_id, sheet_name)
-        columns = data_processor.get_column_suggestions(master_df)
+        # Column list is cached per sheet until the sheet is updated (no sheet copy needed)
+        columns = file_manager.get_sheet_derived(
+            file_id, sheet_name, ("lookup_columns",), data_processor.get_column_suggestions
+        )
 
         return {"success": True, "columns": columns}
 
@@ -241,17 +444,25 @@ async def get_lookup_columns(file_id: str, sheet_name: str):
 async def perform_lookup(request: LookupRequest):
     """Perform lookup operation and add activation status"""
     try:
-        # Get cleaned sheets
-        master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet)
-        target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet)
+        # Get cleaned sheets (the lookup works on its own copies)
+        master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet, copy=False)
+        target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet, copy=False)
+
+        # Reuse the master lookup table across repeated lookups on the same sheet
+        lookup_table = await run_in_threadpool(
+            file_manager.get_lookup_table,
+            request.file_id, request.master_sheet, request.key_column, request.lookup_column,
+            data_processor.build_lookup_table
+        )
 
-        # Perform lookup
-        result_df, stats = data_processor.add_activation_status(
-            master_df, target_df, request.key_column, request.lookup_column
+        # Perform lookup in the thread pool so other requests are not blocked
+        result_df, stats = await run_in_threadpool(
+            data_processor.add_activation_status,
+            master_df, target_df, request.key_column, request.lookup_column, lookup_table
         )
 
-        # Store result
-        file_manager.update_sheet(request.file_id, request.target_sheet, result_df)
+        # Store result (freshly built by the lookup, so no defensive copy)
+        file_manager.update_sheet(request.file_id, request.target_sheet, result_df, copy=False)
 
         # Generate download URL (simplified for demo)
         download_url = f"/download/{request.file_id}/{request.target_sheet}"
@@ -259,7 +470,7 @@ async def perform_lookup(request: LookupRequest):
         return LookupResponse(
             success=True,
             message="Lookup completed successfully",
-            result_preview=result_df.head(20).to_dict('records'),
+            result_preview=dataframe_records(result_df.head(20)),
             kpi_counts=stats["mapping_results"],
             total_records=stats["total_processed"],
             download_url=download_url
@@ -273,23 +484,31 @@ async def perform_lookup(request: LookupRequest):
 
 
 @app.get("/download/{file_id}/{sheet_name}")
-async def download_processed_data(file_id: str, sheet_name: str):
-    """Download processed data as CSV"""
+async def download_processed_data(file_id: str, sheet_name: str, format: str = "csv"):
+    """Download processed data as CSV (default), Parquet or Arrow IPC"""
     try:
-        df = file_manager.get_processed_sheet(file_id, sheet_name)
-
-        # Create CSV in memory
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
-
-        # Return as streaming response
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=processed_{sheet_name}.csv"}
-        )
+        if format not in DOWNLOAD_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format '{format}'. Use one of: {', '.join(DOWNLOAD_FORMATS)}"
+            )
+        media_type, extension = DOWNLOAD_FORMATS[format]
+        headers = {"Content-Disposition": f"attachment; filename=processed_{sheet_name}.{extension}"}
+
+        df = file_manager.get_processed_sheet(file_id, sheet_name, copy=False)
+
+        if format == "csv":
+            # Stream CSV in row blocks so only one block is ever held in memory
+            # (StreamingResponse iterates sync generators in the thread pool)
+            return StreamingResponse(iter_csv_chunks(df), media_type=media_type, headers=headers)
+
+        # Columnar formats skip per-cell text formatting entirely; the encoded file is
+        # sent as one body rather than re-buffered and split on newline bytes
+        content = await run_in_threadpool(dataframe_to_columnar_bytes, df, format)
+        return Response(content=content, media_type=media_type, headers=headers)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -301,13 +520,13 @@ async def download_processed_data(file_id: str, sheet_name: str):
 async def process_master_updates(request: MasterUpdateRequest):
     """Process Master BOM updates based on activation status"""
     try:
-        # Get processed sheets
-        master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet)
-        target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet)
+        # Get processed sheets (process_updates works on its own copies)
+        master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet, copy=False)
+        target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet, copy=False)
 
-        # Process updates
-        updated_master, stats = master_updater.process_updates(
-            master_df, target_df, request.lookup_column
+        # Process updates in the thread pool so other requests are not blocked
+        updated_master, stats = await run_in_threadpool(
+            master_updater.process_updates, master_df, target_df, request.lookup_column
         )
 
         # Store updated master
@@ -322,7 +541,8 @@ async def process_master_updates(request: MasterUpdateRequest):
             inserted_count=stats["inserted_count"],
             duplicates_count=stats["duplicates_count"],
             skipped_count=stats["skipped_count"],
-            duplicates=stats["duplicates"]
+            # Duplicate records carry raw cell values straight from the sheets
+            duplicates=json_safe(stats["duplicates"])
         )
 
     except ValueError as e:
@@ -383,10 +603,12 @@ async def download_sharepoint_file(request: SharePointDownloadRequest):
             # Generate file ID and store in file manager
             file_id = str(uuid.uuid4())
 
-            # Read file and store in file manager
-            if request.file_name.endswith('.xlsx') or request.file_name.endswith('.xls'):
-                sheets_data = pd.read_excel(temp_file, sheet_name=None)
-            elif request.file_name.endswith('.csv'):
+            # Read file and store in file manager (extensions match case-insensitively, like uploads)
+            extension = os.path.splitext(request.file_name)[1].lower()
+            if extension in ('.xlsx', '.xls'):
+                with open_excel(temp_file) as xl:
+                    sheets_data = {name: xl.parse(name) for name in xl.sheet_names}
+            elif extension == '.csv':
                 df = pd.read_csv(temp_file)
                 sheets_data = {"Sheet1": df}
             else:
@@ -648,9 +870,9 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
         target_sheet = request["target_sheet"]
         column_name = request["column_name"]
 
-        # Get the sheet data
-        master_df = file_manager.get_sheet(file_id, master_sheet)
-        target_df = file_manager.get_sheet(file_id, target_sheet)
+        # Get the sheet data (read-only here)
+        master_df = file_manager.get_sheet(file_id, master_sheet, copy=False)
+        target_df = file_manager.get_sheet(file_id, target_sheet, copy=False)
 
         if column_name not in master_df.columns:
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in master sheet")
@@ -661,32 +883,30 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
         if 'YAZAKI PN' not in target_df.columns:
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in target sheet")
 
-        # Get YAZAKI PNs from target sheet
-        target_yazaki_pns = set(target_df['YAZAKI PN'].astype(str).str.strip())
-
-        # Filter master data to only include items NOT in target sheet
-        master_df_copy = master_df.copy()
-        master_df_copy['YAZAKI PN'] = master_df_copy['YAZAKI PN'].astype(str).str.strip()
+        # Get unique YAZAKI PNs from target sheet (a hashed array; isin needs no Python set)
+        target_yazaki_pns = stripped_strings(target_df['YAZAKI PN']).unique()
 
-        # Filter for items NOT in target sheet
-        not_in_target = ~master_df_copy['YAZAKI PN'].isin(target_yazaki_pns)
-        filtered_df = master_df_copy[not_in_target]
+        # Filter master data to only include items NOT in target sheet: one mask over the
+        # stripped keys, applied once to the analysed column only (never the whole frame)
+        master_keys = stripped_strings(master_df['YAZAKI PN'])
+        not_in_target = ~master_keys.isin(target_yazaki_pns).to_numpy()
+        filtered_values = (master_keys if column_name == 'YAZAKI PN' else master_df[column_name])[not_in_target]
 
-        logger.info(f"Filtered analysis: {len(master_df_copy)} total items, {len(filtered_df)} not in target sheet")
+        logger.info(f"Filtered analysis: {len(master_df)} total items, {len(filtered_values)} not in target sheet")
 
-        if len(filtered_df) == 0:
+        if len(filtered_values) == 0:
             return {
                 "success": True,
                 "message": f"No items found in Master BOM that are not in Target sheet",
                 "column_name": column_name,
-                "total_master_rows": len(master_df_copy),
+                "total_master_rows": len(master_df),
                 "filtered_rows": 0,
                 "distribution": {"X": 0, "D": 0, "0": 0, "OTHER": 0},
                 "detailed_breakdown": []
             }
 
         # Analyze distribution of the filtered data
-        value_counts = filtered_df[column_name].value_counts(dropna=False)
+        value_counts = filtered_values.value_counts(dropna=False)
 
         # Categorize values
         distribution = {
@@ -702,7 +922,7 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
                 distribution["OTHER"] += int(count)
 
         # Add NaN/empty count to OTHER
-        nan_count = filtered_df[column_name].isna().sum()
+        nan_count = filtered_values.isna().sum()
         distribution["OTHER"] += int(nan_count)
 
         # Create detailed breakdown
@@ -713,7 +933,7 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
                 "Value": str(value) if pd.notna(value) else "Empty/NaN",
                 "Count": int(count),
                 "Category": category,
-                "Percentage": round((count / len(filtered_df)) * 100, 2),
+                "Percentage": round((count / len(filtered_values)) * 100, 2),
                 "Status": "Not in Target Sheet"
             })
 
@@ -723,7 +943,7 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
                 "Value": "Empty/NaN",
                 "Count": int(nan_count),
                 "Category": "OTHER",
-                "Percentage": round((nan_count / len(filtered_df)) * 100, 2),
+                "Percentage": round((nan_count / len(filtered_values)) * 100, 2),
                 "Status": "Not in Target Sheet"
             })
 
@@ -736,8 +956,8 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
             "success": True,
             "message": f"Filtered analysis completed for column '{column_name}' (items not in target sheet)",
             "column_name": column_name,
-            "total_master_rows": len(master_df_copy),
-            "filtered_rows": len(filtered_df),
+            "total_master_rows": len(master_df),
+            "filtered_rows": len(filtered_values),
             "target_sheet": target_sheet,
             "distribution": distribution,
             "detailed_breakdown": detailed_breakdown
@@ -757,9 +977,9 @@ async def process_preexisting_items(request: Dict[str, Any]):
         target_sheet = request["target_sheet"]
         column_name = request["column_name"]
 
-        # Get the data
-        master_df = file_manager.get_sheet(file_id, master_sheet)
-        target_df = file_manager.get_sheet(file_id, target_sheet)
+        # Get the data (the master is copied once below before it is modified)
+        master_df = file_manager.get_sheet(file_id, master_sheet, copy=False)
+        target_df = file_manager.get_sheet(file_id, target_sheet, copy=False)
 
         if column_name not in master_df.columns:
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in master sheet")
@@ -770,18 +990,18 @@ async def process_preexisting_items(request: Dict[str, Any]):
         if 'YAZAKI PN' not in target_df.columns:
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in target sheet")
 
-        # Get YAZAKI PNs from target sheet
-        target_yazaki_pns = set(target_df['YAZAKI PN'].astype(str).str.strip())
+        # Get unique YAZAKI PNs from target sheet (a hashed array; isin needs no Python set)
+        target_yazaki_pns = stripped_strings(target_df['YAZAKI PN']).unique()
 
         # Find items in master that are:
         # 1. Not in target sheet
         # 2. Have status 'X' in the specified column
         master_df_copy = master_df.copy()
-        master_df_copy['YAZAKI PN'] = master_df_copy['YAZAKI PN'].astype(str).str.strip()
+        master_df_copy['YAZAKI PN'] = stripped_strings(master_df_copy['YAZAKI PN'])
 
         # Create mask for items to update
         not_in_target = ~master_df_copy['YAZAKI PN'].isin(target_yazaki_pns)
-        has_x_status = master_df_copy[column_name].astype(str).str.strip() == 'X'
+        has_x_status = stripped_strings(master_df_copy[column_name]) == 'X'
         items_to_update = not_in_target & has_x_status
 
         # Debug logging
@@ -791,26 +1011,13 @@ async def process_preexisting_items(request: Dict[str, Any]):
         logger.info(f"Items with 'X' status: {has_x_status.sum()}")
         logger.info(f"Items to update (not in target AND has X): {items_to_update.sum()}")
 
-        # Store original state for rollback
-        original_master_df = master_df_copy.copy()
+        # Store original state for rollback (an idle copy, so repetitive text columns such as
+        # statuses are kept as categoricals until a rollback restores them)
+        original_master_df, original_master_dtypes = compact_copy(master_df_copy)
 
         # Calculate original distribution (entire Master BOM)
         original_value_counts = master_df_copy[column_name].value_counts(dropna=False)
-        original_distribution = {
-            "X": int(original_value_counts.get("X", 0)),
-            "D": int(original_value_counts.get("D", 0)),
-            "0": int(original_value_counts.get("0", 0)) + int(original_value_counts.get(0, 0)),
-            "OTHER": 0
-        }
-
-        # Count other values in original
-        for value, count in original_value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                original_distribution["OTHER"] += int(count)
-
-        # Add NaN/empty count to OTHER in original
-        original_nan_count = master_df_copy[column_name].isna().sum()
-        original_distribution["OTHER"] += int(original_nan_count)
+        original_distribution = status_distribution(original_value_counts)
 
         # Count items
         total_checked = len(master_df_copy)
@@ -820,16 +1027,21 @@ async def process_preexisting_items(request: Dict[str, Any]):
         logger.info(f"Pre-existing processing: {updated_count} items will be updated from X to D")
         logger.info(f"Original distribution - X: {original_distribution['X']}, D: {original_distribution['D']}")
 
+        # Derive the new distribution from the original one: the updated rows move to 'D'
+        replaced_value_counts = master_df_copy.loc[items_to_update, column_name].value_counts(dropna=False)
+        new_value_counts = original_value_counts.sub(replaced_value_counts, fill_value=0)
+        new_value_counts["D"] = new_value_counts.get("D", 0) + updated_count
+        new_distribution = status_distribution(new_value_counts)
+
         # Update the items
         master_df_copy.loc[items_to_update, column_name] = 'D'
 
         # Get preview of updated items
-        updated_items = master_df_copy[items_to_update].copy()
         updated_items_preview = []
 
-        if len(updated_items) > 0:
+        if updated_count > 0:
             # Show first 10 updated items
-            preview_items = updated_items.head(10)
+            preview_items = master_df_copy.loc[items_to_update].head(10)
             for _, row in preview_items.iterrows():
                 updated_items_preview.append({
                     "YAZAKI PN": row['YAZAKI PN'],
@@ -839,26 +1051,9 @@ async def process_preexisting_items(request: Dict[str, Any]):
                     f"{column_name}": row[column_name]
                 })
 
-        # Calculate new distribution
-        new_value_counts = master_df_copy[column_name].value_counts(dropna=False)
-        new_distribution = {
-            "X": int(new_value_counts.get("X", 0)),
-            "D": int(new_value_counts.get("D", 0)),
-            "0": int(new_value_counts.get("0", 0)) + int(new_value_counts.get(0, 0)),
-            "OTHER": 0
-        }
-
-        # Count other values
-        for value, count in new_value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                new_distribution["OTHER"] += int(count)
-
-        # Add NaN/empty count to OTHER
-        nan_count = master_df_copy[column_name].isna().sum()
-        new_distribution["OTHER"] += int(nan_count)
-
         # Store original state for rollback before updating
-        file_manager.files_storage[file_id]["original_master_backup"] = original_master_df.copy()
+        file_manager.files_storage[file_id]["original_master_backup"] = original_master_df
+        file_manager.files_storage[file_id]["original_master_dtypes"] = original_master_dtypes
         file_manager.files_storage[file_id]["backup_metadata"] = {
             "timestamp": datetime.now().isoformat(),
             "column_name": column_name,
@@ -866,8 +1061,8 @@ async def process_preexisting_items(request: Dict[str, Any]):
             "original_distribution": original_distribution
         }
 
-        # Update the file manager with the modified data
-        file_manager.update_sheet(file_id, master_sheet, master_df_copy)
+        # Update the file manager with the modified data (already our own copy)
+        file_manager.update_sheet(file_id, master_sheet, master_df_copy, copy=False)
 
         logger.info(f"Pre-existing items processed: {updated_count} items updated from X to D")
         logger.info(f"New distribution - X: {new_distribution['X']}, D: {new_distribution['D']}")
@@ -914,12 +1109,12 @@ async def rollback_preexisting_changes(request: Dict[str, Any]):
         if "original_master_backup" not in file_data:
             raise HTTPException(status_code=404, detail="No backup available for rollback")
 
-        # Get backup data
-        original_master_df = file_data["original_master_backup"]
+        # Get backup data, with its categorical columns converted back
+        original_master_df = file_data["original_master_backup"].astype(file_data.get("original_master_dtypes", {}))
         backup_metadata = file_data.get("backup_metadata", {})
 
-        # Restore original state
-        file_manager.update_sheet(file_id, master_sheet, original_master_df)
+        # Restore original state (the backup is dropped below, so it can be stored as is)
+        file_manager.update_sheet(file_id, master_sheet, original_master_df, copy=False)
 
         # Calculate current distribution for comparison
         column_name = backup_metadata.get("column_name", "UNKNOWN")
@@ -945,6 +1140,7 @@ async def rollback_preexisting_changes(request: Dict[str, Any]):
 
         # Clear backup after successful rollback
         del file_data["original_master_backup"]
+        file_data.pop("original_master_dtypes", None)
         if "backup_metadata" in file_data:
             del file_data["backup_metadata"]
 
@@ -1075,7 +1271,7 @@ async def get_dashboard_data():
             raise HTTPException(status_code=404, detail="File not found")
 
         # Read the Excel file
-        excel_data = pd.ExcelFile(file_path)
+        excel_data = open_excel(file_path)
 
         # Initialize dashboard data
         dashboard_data = {
@@ -1088,7 +1284,7 @@ async def get_dashboard_data():
 
         # Process MasterBOM sheet if available
         if "MasterBOM" in excel_data.sheet_names:
-            master_bom = pd.read_excel(file_path, sheet_name="MasterBOM")
+            master_bom = excel_data.parse("MasterBOM")
 
             # Generate BOM analysis
             dashboard_data["bom_analysis"] = {
@@ -1114,7 +1310,7 @@ async def get_dashboard_data():
 
         # Process Status sheet if available
         if "Status" in excel_data.sheet_names:
-            status_data = pd.read_excel(file_path, sheet_name="Status")
+            status_data = excel_data.parse("Status")
 
             # Status breakdown
             if "Status" in status_data.columns:
@@ -1195,29 +1391,17 @@ async def get_bom_analysis():
             raise HTTPException(status_code=404, detail="File not found")
 
         # Read the Excel file
-        excel_data = pd.ExcelFile(file_path)
+        excel_data = open_excel(file_path)
 
         bom_data = []
         category_analysis = []
 
         # Process MasterBOM sheet if available
         if "MasterBOM" in excel_data.sheet_names:
-            master_bom = pd.read_excel(file_path, sheet_name="MasterBOM")
+            master_bom = excel_data.parse("MasterBOM")
 
             # Convert to list of dictionaries for frontend
-            for _, row in master_bom.iterrows():
-                bom_data.append({
-                    "part_number": str(row.get("Part Number", "")),
-                    "description": str(row.get("Description", "")),
-                    "category": str(row.get("Category", "Unknown")),
-                    "status": str(row.get("Status", "NOT_FOUND")),
-                    "quantity": int(row.get("Quantity", 0)),
-                    "unit_cost": float(row.get("Unit Cost", 0)),
-                    "total_cost": float(row.get("Total Cost", 0)),
-                    "supplier": str(row.get("Supplier", "Unknown")),
-                    "last_updated": str(row.get("Last Updated", "")),
-                    "criticality": str(row.get("Criticality", "Medium"))
-                })
+            bom_data = bom_records(master_bom)
 
             # Generate category analysis
             if "Category" in master_bom.columns:
@@ -1329,16 +1513,10 @@ async def clean_data_session():
         if not session_data.get('master_sheet') or not session_data.get('target_sheet'):
             raise HTTPException(status_code=400, detail="Please preview sheets first")
 
-        # Get original sheets
-        master_df = file_manager.get_sheet(file_id, session_data['master_sheet'])
-        target_df = file_manager.get_sheet(file_id, session_data['target_sheet'])
-
-        # Clean master sheet (YAZAKI PN only)
-        master_cleaned, master_stats = data_cleaner.clean_master_yazaki(master_df)
-
-        # Clean target sheet
-        target_cleaned, target_stats = data_cleaner.clean_generic_sheet(target_df)
-        target_cleaned = data_cleaner.prepare_target_sheet(target_cleaned)
+        # Cleaning is CPU-bound pandas work: keep it off the event loop
+        master_cleaned, target_cleaned = await run_in_threadpool(
+            clean_master_and_target, file_id, session_data['master_sheet'], session_data['target_sheet']
+        )
 
         # Store cleaned data
         file_manager.update_sheet(file_id, session_data['master_sheet'], master_cleaned)
@@ -1347,8 +1525,8 @@ async def clean_data_session():
         return {
             "success": True,
             "message": "Data cleaning completed successfully",
-            "master_preview": master_cleaned[["YAZAKI PN"]].head(5).fillna('').to_dict('records'),
-            "target_preview": target_cleaned.head(5).fillna('').to_dict('records'),
+            "master_preview": dataframe_records(master_cleaned[["YAZAKI PN"]].head(5).fillna('')),
+            "target_preview": dataframe_records(target_cleaned.head(5).fillna('')),
             "master_shape": list(master_cleaned.shape),
             "target_shape": list(target_cleaned.shape)
         }
@@ -1372,8 +1550,10 @@ async def get_lookup_columns_session():
         if not session_data.get('master_sheet'):
             raise HTTPException(status_code=400, detail="Please clean data first")
 
-        master_df = file_manager.get_processed_sheet(file_id, session_data['master_sheet'])
-        columns = data_processor.get_column_suggestions(master_df)
+        # Column list is cached per sheet until the sheet is updated (no sheet copy needed)
+        columns = file_manager.get_sheet_derived(
+            file_id, session_data['master_sheet'], ("lookup_columns",), data_processor.get_column_suggestions
+        )
 
         return {"success": True, "columns": columns}
 
@@ -1400,22 +1580,30 @@ async def perform_lookup_session(request: dict):
         if not session_data.get('master_sheet') or not session_data.get('target_sheet'):
             raise HTTPException(status_code=400, detail="Please clean data first")
 
-        # Get cleaned sheets
-        master_df = file_manager.get_processed_sheet(file_id, session_data['master_sheet'])
-        target_df = file_manager.get_processed_sheet(file_id, session_data['target_sheet'])
+        # Get cleaned sheets (the lookup works on its own copies)
+        master_df = file_manager.get_processed_sheet(file_id, session_data['master_sheet'], copy=False)
+        target_df = file_manager.get_processed_sheet(file_id, session_data['target_sheet'], copy=False)
 
-        # Perform lookup
-        result_df, stats = data_processor.add_activation_status(
-            master_df, target_df, "YAZAKI PN", lookup_column
+        # Reuse the master lookup table across repeated lookups on the same sheet
+        lookup_table = await run_in_threadpool(
+            file_manager.get_lookup_table,
+            file_id, session_data['master_sheet'], "YAZAKI PN", lookup_column,
+            data_processor.build_lookup_table
         )
 
-        # Store result
-        file_manager.update_sheet(file_id, session_data['target_sheet'], result_df)
+        # Perform lookup in the thread pool so other requests are not blocked
+        result_df, stats = await run_in_threadpool(
+            data_processor.add_activation_status,
+            master_df, target_df, "YAZAKI PN", lookup_column, lookup_table
+        )
+
+        # Store result (freshly built by the lookup, so no defensive copy)
+        file_manager.update_sheet(file_id, session_data['target_sheet'], result_df, copy=False)
 
         return {
             "success": True,
             "message": "Lookup completed successfully",
-            "result_preview": result_df.head(20).fillna('').to_dict('records'),
+            "result_preview": dataframe_records(result_df.head(20).fillna('')),
             "total_records": stats["total_processed"],
             "successful_matches": stats["mapping_results"].get("Found", 0),
             "failed_matches": stats["mapping_results"].get("Not Found", 0),
@@ -1444,34 +1632,32 @@ async def generate_column_insights():
         if not session_data.get('master_sheet') or not session_data.get('target_sheet'):
             raise HTTPException(status_code=400, detail="Please clean data first")
 
-        # Get cleaned sheets
-        master_df = file_manager.get_processed_sheet(file_id, session_data['master_sheet'])
-        target_df = file_manager.get_processed_sheet(file_id, session_data['target_sheet'])
+        # Column statistics of the cleaned sheets, computed once per sheet version
+        master_profile = file_manager.get_sheet_derived(
+            file_id, session_data['master_sheet'], ("column_profile",), column_profile
+        )
+        target_profile = file_manager.get_sheet_derived(
+            file_id, session_data['target_sheet'], ("column_profile",), column_profile
+        )
 
         # Generate column insights (convert numpy types to Python types for JSON serialization)
         insights = {
             "master_sheet_analysis": {
-                "total_columns": int(len(master_df.columns)),
-                "total_rows": int(len(master_df)),
-                "yazaki_pn_column": "YAZAKI PN" in master_df.columns,
-                "yazaki_pn_unique_count": int(master_df["YAZAKI PN"].nunique()) if "YAZAKI PN" in master_df.columns else 0,
-                "yazaki_pn_null_count": int(master_df["YAZAKI PN"].isnull().sum()) if "YAZAKI PN" in master_df.columns else 0,
-                "column_types": {col: str(dtype) for col, dtype in master_df.dtypes.items()},
-                "sample_data": master_df.head(3).fillna('').to_dict('records')
+                key: master_profile[key] for key in (
+                    "total_columns", "total_rows", "yazaki_pn_column", "yazaki_pn_unique_count",
+                    "yazaki_pn_null_count", "column_types", "sample_data"
+                )
             },
             "target_sheet_analysis": {
-                "total_columns": int(len(target_df.columns)),
-                "total_rows": int(len(target_df)),
-                "column_types": {col: str(dtype) for col, dtype in target_df.dtypes.items()},
-                "sample_data": target_df.head(3).fillna('').to_dict('records')
+                key: target_profile[key] for key in ("total_columns", "total_rows", "column_types", "sample_data")
             },
             "data_quality": {
-                "master_completeness": {col: float(val) for col, val in ((master_df.notna().sum() / len(master_df)) * 100).round(2).items()},
-                "target_completeness": {col: float(val) for col, val in ((target_df.notna().sum() / len(target_df)) * 100).round(2).items()},
+                "master_completeness": master_profile["completeness"],
+                "target_completeness": target_profile["completeness"],
             }
         }
 
-        logger.info(f"Column insights generated for {len(master_df)} master records and {len(target_df)} target records")
+        logger.info(f"Column insights generated for {master_profile['total_rows']} master records and {target_profile['total_rows']} target records")
 
         return {
             "success": True,
@@ -1501,23 +1687,17 @@ async def generate_lookup_insights():
         if not session_data.get('target_sheet'):
             raise HTTPException(status_code=400, detail="Please perform lookup first")
 
-        # Get lookup results
-        target_df = file_manager.get_processed_sheet(file_id, session_data['target_sheet'])
-
-        # Check for activation status column (could be different names)
-        activation_columns = [col for col in target_df.columns if 'activation' in col.lower() or 'status' in col.lower()]
-        if not activation_columns:
+        # Aggregates of the lookup results, computed once per target sheet version
+        summary = file_manager.get_sheet_derived(
+            file_id, session_data['target_sheet'], ("activation_summary",), activation_summary
+        )
+        if summary is None:
+            target_df = file_manager.get_processed_sheet(file_id, session_data['target_sheet'], copy=False)
             logger.warning(f"Available columns: {list(target_df.columns)}")
             raise HTTPException(status_code=400, detail="No lookup results found. Please perform lookup first.")
 
-        activation_col = activation_columns[0]  # Use the first matching column
-
-        # Generate lookup insights
-        activation_counts = target_df[activation_col].value_counts().to_dict()
-        total_records = int(len(target_df))
-
-        # Convert numpy types to Python types for JSON serialization
-        activation_counts_clean = {str(k): int(v) for k, v in activation_counts.items()}
+        activation_counts_clean = summary["activation_counts"]
+        total_records = summary["total_records"]
 
         # Map status categories to match Streamlit format
         status_0 = activation_counts_clean.get('0', 0)
@@ -1582,7 +1762,7 @@ async def generate_lookup_insights():
         if status_0 > 0:
             insights["recommendations"].append(f"Found {status_0} parts with status '0' requiring activation check.")
 
-        logger.info(f"Lookup insights generated: {match_rate}% match rate, {len(activation_counts)} status types")
+        logger.info(f"Lookup insights generated: {match_rate}% match rate, {len(activation_counts_clean)} status types")
 
         return {
             "success": True,
@@ -41,6 +41,7 @@ class CleaningResponse(BaseModel):
     target_preview: List[Dict[str, Any]]
     master_shape: List[int]
     target_shape: List[int]
+    master_lookup_columns: Optional[List[Any]] = None
 
 
 class LookupRequest(BaseModel):
@@ -6,13 +6,18 @@ Debug script to test the enhanced ETL workflow with insights
 import requests
 import json
 import time
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://localhost:8000"
 
+# One keep-alive session for the whole workflow instead of a new connection per call
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 def test_health():
     """Test API health"""
     print("🔍 Testing API Health...")
-    response = requests.get(f"{BASE_URL}/")
+    response = session.get(f"{BASE_URL}/")
     print(f"✅ Health: {response.status_code} - {response.json()}")
     return response.status_code == 200
 
@@ -21,7 +26,7 @@ def test_upload_simulation():
     print("\n🔍 Testing File Upload (checking existing files)...")
     
     # Test preview to see if files exist
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/preview-session",
         headers={"Content-Type": "application/json"},
         json={"master_sheet": "MasterBOM", "target_sheet": "Sheet2"}
@@ -40,7 +45,7 @@ def test_clean_data():
     """Test data cleaning"""
     print("\n🔍 Testing Data Cleaning...")
     
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/clean-session",
         headers={"Content-Type": "application/json"},
         json={}
@@ -63,7 +68,7 @@ def test_column_insights():
     """Test new column insights endpoint"""
     print("\n🔍 Testing Column Insights (NEW)...")
     
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/column-insights",
         headers={"Content-Type": "application/json"},
         json={}
@@ -93,7 +98,7 @@ def test_lookup():
     print("\n🔍 Testing Lookup Operation...")
     
     # First get available columns
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/get-lookup-columns",
         headers={"Content-Type": "application/json"},
         json={}
@@ -112,7 +117,7 @@ def test_lookup():
     print(f"   Using lookup column: {lookup_column}")
     
     # Perform lookup
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/lookup-session",
         headers={"Content-Type": "application/json"},
         json={"lookup_column": lookup_column}
@@ -139,7 +144,7 @@ def test_lookup_insights():
     """Test new lookup insights endpoint"""
     print("\n🔍 Testing Lookup Insights (NEW)...")
     
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/lookup-insights",
         headers={"Content-Type": "application/json"},
         json={}
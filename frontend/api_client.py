@@ -3,8 +3,57 @@ API client for communicating with FastAPI backend
 """
 import requests
 import streamlit as st
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.fields import RequestField
+from urllib3.util.retry import Retry
+from typing import BinaryIO, Dict, Iterator, List, Any, Optional, Tuple
 import io
+import tempfile
+import uuid
+
+# File parts are sent in blocks of this size; smaller blocks are dominated by per-write overhead
+UPLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Seconds to wait for the connection and between received chunks of a download
+DOWNLOAD_TIMEOUT = 30
+
+# Independent requests of one rerun are sent from these threads; kept below the session's
+# pool_maxsize so concurrent requests never wait for a free connection
+REQUEST_WORKERS = 8
+_request_pool = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix="api-request")
+
+
+class _MultipartFileStream:
+    """Single-file multipart body that reads the file in chunks while it is sent
+
+    Defining len() lets requests send a Content-Length header instead of a chunked body.
+    """
+
+    def __init__(self, fileobj: BinaryIO, filename: str, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        field = RequestField(name="file", data=b"", filename=filename)
+        field.make_multipart(content_type="application/octet-stream")
+        self._head = f"--{self.boundary}\r\n".encode() + field.render_headers().encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._fileobj = fileobj
+        self._chunk_size = chunk_size
+        self._size = fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(0)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        self._fileobj.seek(0)
+        while chunk := self._fileobj.read(self._chunk_size):
+            yield chunk
+        yield self._tail
 
 
 class ETLAPIClient:
@@ -13,6 +62,12 @@ class ETLAPIClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        # Keep-alive pool; idempotent requests (GET) are retried on transient connection errors
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def upload_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Upload file to backend"""
@@ -25,6 +80,19 @@ class ETLAPIClient:
             st.error(f"Upload failed: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def upload_file_stream(self, fileobj: BinaryIO, filename: str) -> Dict[str, Any]:
+        """Upload a file-like object without building the whole multipart body in memory"""
+        try:
+            body = _MultipartFileStream(fileobj, filename)
+            response = self.session.post(
+                f"{self.base_url}/upload", data=body, headers={"Content-Type": body.content_type}
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            st.error(f"Upload failed: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
     def preview_sheets(self, file_id: str, sheet_names: List[str]) -> Dict[str, Any]:
         """Get sheet previews"""
         try:
@@ -297,16 +365,44 @@ class ETLAPIClient:
             st.error(f"Rollback status check failed: {str(e)}")
             return {"success": False, "error": str(e)}
 
-    def download_data(self, file_id: str, sheet_name: str) -> Optional[bytes]:
-        """Download processed data"""
+    def download_data(self, file_id: str, sheet_name: str, file_format: str = "csv") -> Optional[bytes]:
+        """Download processed data as csv, parquet or arrow"""
         try:
-            response = self.session.get(f"{self.base_url}/download/{file_id}/{sheet_name}")
+            response = self.session.get(
+                f"{self.base_url}/download/{file_id}/{sheet_name}",
+                params={"format": file_format}
+            )
             response.raise_for_status()
             return response.content
         except requests.exceptions.RequestException as e:
             st.error(f"Download failed: {str(e)}")
             return None
     
+    def download_to_file(self, file_id: str, sheet_name: str, file_format: str = "csv") -> Optional[BinaryIO]:
+        """Stream processed data into a temporary file (rewound, deleted on close)
+
+        The file is unbuffered: st.download_button accepts raw file objects but not buffered
+        read/write ones (or spooled files). It still reads the whole file into memory itself
+        (Streamlit 1.28.1 takes no generators), so this saves only the response.content copy.
+        """
+        target = tempfile.TemporaryFile(buffering=0)
+        try:
+            with self.session.get(
+                f"{self.base_url}/download/{file_id}/{sheet_name}",
+                params={"format": file_format},
+                stream=True,
+                timeout=DOWNLOAD_TIMEOUT
+            ) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    target.write(chunk)
+            target.seek(0)
+            return target
+        except requests.exceptions.RequestException as e:
+            target.close()
+            st.error(f"Download failed: {str(e)}")
+            return None
+    
     def process_master_updates(self, file_id: str, master_sheet: str, target_sheet: str,
                               lookup_column: str) -> Dict[str, Any]:
         """Process Master BOM updates based on activation status"""
@@ -332,6 +428,20 @@ class ETLAPIClient:
         except:
             return False
 
+    def backend_status(self) -> Tuple[bool, Dict[str, Any]]:
+        """Health check and log summary, requested concurrently"""
+        def log_summary() -> Dict[str, Any]:
+            response = self.session.get(f"{self.base_url}/logs/summary")
+            response.raise_for_status()
+            return response.json()
+
+        pending_summary = _request_pool.submit(log_summary)
+        healthy = self.health_check()
+        try:
+            return healthy, pending_summary.result()
+        except requests.exceptions.RequestException as e:
+            return healthy, {"success": False, "error": str(e)}
+
     def clear_cache(self) -> Dict[str, Any]:
         """Clear all cached files for performance optimization"""
         try:
@@ -343,5 +453,11 @@ class ETLAPIClient:
             return {"success": False, "error": str(e)}
 
 
+@st.cache_resource
+def get_api_client() -> ETLAPIClient:
+    """Client shared by every rerun and session, so its connection pool stays warm"""
+    return ETLAPIClient()
+
+
 # Global API client instance
-api_client = ETLAPIClient()
+api_client = get_api_client()
@@ -2,17 +2,15 @@
 Enhanced Streamlit frontend for ETL Automation Tool
 """
 import streamlit as st
-import pandas as pd
-from typing import Dict, List, Any
-import time
+from typing import Dict, Any
 
 from api_client import api_client
 from components import (
-    add_log, display_logs, display_kpi_metrics, create_status_chart,
+    add_log, display_logs, new_log_buffer, display_kpi_metrics, display_metric_row, create_status_chart,
     display_dataframe_with_search, create_progress_bar, display_file_info,
-    display_error_message, display_success_message, fix_dataframe_types,
+    display_error_message, display_success_message, records_frame,
     create_distribution_chart, create_comparison_chart, create_processing_flow_chart,
-    create_trend_analysis_chart
+    create_trend_analysis_chart, inject_custom_css, backend_status
 )
 
 # Page configuration
@@ -23,41 +21,48 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Status distribution counts default to 0 for categories a response leaves out
+STATUS_COUNT_DEFAULTS = {"X": 0, "D": 0, "0": 0, "OTHER": 0}
+
+# Result download formats: label -> (backend format, MIME type)
+DOWNLOAD_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# (label, key, help) specs of the metric rows shown below
+FILTERED_DISTRIBUTION_METRICS = [
+    ("Status 'X'", "X", "Items with status 'X' that are not in target sheet"),
+    ("Status 'D'", "D", "Items with status 'D' that are not in target sheet"),
+    ("Status '0'", "0", "Items with status '0' that are not in target sheet"),
+    ("Other/Empty", "OTHER", "Items with other/empty status that are not in target sheet"),
+]
+NEW_DISTRIBUTION_METRICS = [
+    ("New 'X' Count", "X", None),
+    ("New 'D' Count", "D", None),
+    ("Status '0'", "0", None),
+    ("Other/Empty", "OTHER", None),
+]
+UPDATE_OPERATION_METRICS = [
+    ("Status 'X' (No Update)", "X", "Records that will not be updated"),
+    ("Status 'D' (Update)", "D", "Records that will update existing entries"),
+    ("Status '0' (Check/Insert)", "0", "Records to check for duplicates or insert"),
+    ("Not Found (Insert)", "NOT_FOUND", "Records to insert as new entries"),
+]
+UPDATE_RESULT_METRICS = [
+    ("Records Updated", "updated_count", None),
+    ("Records Inserted", "inserted_count", None),
+    ("Duplicates Found", "duplicates_count", None),
+    ("Skipped (X status)", "skipped_count", None),
+]
+
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .step-header {
-        font-size: 1.5rem;
-        color: #2e8b57;
-        border-bottom: 2px solid #2e8b57;
-        padding-bottom: 0.5rem;
-        margin: 1rem 0;
-    }
-    .metric-container {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 0.25rem;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_custom_css()
 
 # Initialize session state
 if 'logs' not in st.session_state:
-    st.session_state.logs = []
+    st.session_state.logs = new_log_buffer()
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 0
 if 'file_id' not in st.session_state:
@@ -65,11 +70,47 @@ if 'file_id' not in st.session_state:
 if 'sheet_names' not in st.session_state:
     st.session_state.sheet_names = []
 
+
+# Previews (of the raw sheets) and lookup columns (of the cleaned master) are fixed for a
+# given upload, so they are kept on disk and reused by later sessions on the same file_id
+@st.cache_data(persist="disk", show_spinner=False, max_entries=32)
+def preview_sheets_cached(file_id: str, sheet_names: tuple) -> Dict[str, Any]:
+    """Sheet previews, fetched once per (file_id, sheets)"""
+    return api_client.preview_sheets(file_id, list(sheet_names))
+
+
+def rollback_status_cached(file_id: str) -> Dict[str, Any]:
+    """Rollback availability, fetched once per file until processing or a rollback changes it"""
+    cached = st.session_state.get('rollback_status')
+    if cached is None or cached[0] != file_id:
+        status = api_client.get_rollback_status(file_id)
+        if not status.get("success", True):
+            return status
+        cached = (file_id, status)
+        st.session_state.rollback_status = cached
+    return cached[1]
+
+
+# The filtered analysis reads the uploaded (raw) sheets, which never change for a file_id,
+# so re-analysing a column is answered without a request
+@st.cache_data(persist="disk", show_spinner=False, max_entries=64)
+def column_analysis_cached(file_id: str, master_sheet: str, target_sheet: str, column_name: str) -> Dict[str, Any]:
+    """Status distribution of a column for items not in the target, fetched once per selection"""
+    return api_client.analyze_column_distribution_filtered(file_id, master_sheet, target_sheet, column_name)
+
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=32)
+def lookup_columns_cached(file_id: str, sheet_name: str) -> Dict[str, Any]:
+    """Lookup columns, fetched once per (file_id, sheet)"""
+    return api_client.get_lookup_columns(file_id, sheet_name)
+
+
 # Main header
 st.markdown('<h1 class="main-header">🔧 ETL Automation Tool v2.0</h1>', unsafe_allow_html=True)
 
-# Check API connection
-if not api_client.health_check():
+# Check API connection (the sidebar's log summary is fetched alongside)
+backend_healthy, _ = backend_status()
+if not backend_healthy:
     st.error("❌ Cannot connect to backend API. Please ensure the FastAPI server is running on http://localhost:8000")
     st.stop()
 
@@ -186,13 +227,9 @@ with col_main:
     
     if uploaded_file and not st.session_state.file_id:
         with st.spinner("Uploading file..."):
-            # Clear Streamlit cache before processing new file for optimal performance
-            st.cache_data.clear()
-            st.cache_resource.clear()
-            add_log("Cache cleared for optimal performance")
-
-            file_content = uploaded_file.read()
-            result = api_client.upload_file(file_content, uploaded_file.name)
+            # Every session gets its own backend file_id: processed sheets and rollback
+            # backups live under it, so it must never be shared between sessions
+            result = api_client.upload_file_stream(uploaded_file, uploaded_file.name)
 
             if result.get("success"):
                 st.session_state.file_id = result["file_id"]
@@ -200,11 +237,6 @@ with col_main:
                 st.session_state.current_step = 1
                 add_log(f"File uploaded: {uploaded_file.name}")
                 display_success_message(result["message"])
-
-                # Clear cache again after successful upload to free memory
-                st.cache_data.clear()
-                add_log("Upload cache cleared for performance optimization")
-                st.rerun()
             else:
                 display_error_message("File upload failed", result.get("error"))
     
@@ -225,7 +257,16 @@ with col_main:
             )
         
         with col2:
-            target_options = [s for s in st.session_state.sheet_names if s != master_sheet]
+            # Rebuilt only when the master selection or the uploaded sheet list changes
+            cached_options = st.session_state.get('target_options')
+            if (cached_options is None or cached_options[0] is not st.session_state.sheet_names
+                    or cached_options[1] != master_sheet):
+                cached_options = (
+                    st.session_state.sheet_names, master_sheet,
+                    [s for s in st.session_state.sheet_names if s != master_sheet]
+                )
+                st.session_state.target_options = cached_options
+            target_options = cached_options[2]
             target_sheet = st.selectbox(
                 "Select Target Sheet",
                 target_options,
@@ -235,9 +276,9 @@ with col_main:
         # Preview button
         if st.button("👀 Preview Selected Sheets", type="primary"):
             with st.spinner("Loading preview..."):
-                preview_result = api_client.preview_sheets(
-                    st.session_state.file_id, 
-                    [master_sheet, target_sheet]
+                preview_result = preview_sheets_cached(
+                    st.session_state.file_id,
+                    (master_sheet, target_sheet)
                 )
                 
                 if preview_result.get("success"):
@@ -246,8 +287,8 @@ with col_main:
                     st.session_state.target_sheet = target_sheet
                     st.session_state.current_step = 2
                     add_log(f"Previewed sheets: {master_sheet}, {target_sheet}")
-                    st.rerun()
                 else:
+                    preview_sheets_cached.clear()
                     display_error_message("Preview failed", preview_result.get("error"))
     
     # Display preview data
@@ -257,8 +298,8 @@ with col_main:
         for sheet_name, data in st.session_state.preview_data.items():
             st.write(f"**{sheet_name}**")
             if data:
-                df = pd.DataFrame(data)
-                df = fix_dataframe_types(df)  # Fix types for Arrow compatibility
+                # Built once per preview payload, with types fixed for Arrow compatibility
+                df = records_frame(data, f"preview_{sheet_name}")
                 st.dataframe(df, use_container_width=True)
             else:
                 st.warning(f"No data in {sheet_name}")
@@ -279,10 +320,15 @@ with col_main:
                 
                 if clean_result.get("success"):
                     st.session_state.clean_result = clean_result
+                    # Lookup columns of the newly cleaned master come with the response
+                    # (fetched separately on the next run from a backend that omits them)
+                    if clean_result.get("master_lookup_columns"):
+                        st.session_state.available_columns = clean_result["master_lookup_columns"]
+                    else:
+                        st.session_state.pop('available_columns', None)
                     st.session_state.current_step = 3
                     add_log("Data cleaning completed")
                     display_success_message(clean_result["message"])
-                    st.rerun()
                 else:
                     display_error_message("Cleaning failed", clean_result.get("error"))
 
@@ -296,16 +342,14 @@ with col_main:
             st.write(f"**Master ({st.session_state.master_sheet}) - YAZAKI PN only**")
             st.write(f"Shape: {st.session_state.clean_result['master_shape']}")
             if st.session_state.clean_result['master_preview']:
-                df = pd.DataFrame(st.session_state.clean_result['master_preview'])
-                df = fix_dataframe_types(df)  # Fix types for Arrow compatibility
+                df = records_frame(st.session_state.clean_result['master_preview'], "clean_master")
                 st.dataframe(df, use_container_width=True)
 
         with col2:
             st.write(f"**Target ({st.session_state.target_sheet})**")
             st.write(f"Shape: {st.session_state.clean_result['target_shape']}")
             if st.session_state.clean_result['target_preview']:
-                df = pd.DataFrame(st.session_state.clean_result['target_preview'])
-                df = fix_dataframe_types(df)  # Fix types for Arrow compatibility
+                df = records_frame(st.session_state.clean_result['target_preview'], "clean_target")
                 st.dataframe(df, use_container_width=True)
 
     # Column Analysis Section (after data cleaning)
@@ -320,19 +364,22 @@ with col_main:
             st.session_state.get('master_sheet')):
 
             try:
-                # Get the actual cleaned master data from backend
-                with st.spinner("Loading cleaned master data for column analysis..."):
-                    # Use a simple API call to get column names from the cleaned data
-                    columns_result = api_client.get_lookup_columns(
-                        st.session_state.file_id,
-                        st.session_state.master_sheet
-                    )
+                # Column names of the cleaned master are kept in session state and shared with
+                # the LOCKUP step, so reruns do not repeat the request
+                if not st.session_state.get('available_columns'):
+                    with st.spinner("Loading cleaned master data for column analysis..."):
+                        columns_result = lookup_columns_cached(
+                            st.session_state.file_id,
+                            st.session_state.master_sheet
+                        )
+
+                    if columns_result.get("success") and columns_result.get("columns"):
+                        st.session_state.available_columns = columns_result["columns"]
+                    else:
+                        lookup_columns_cached.clear()
+                        st.error("Failed to load columns from cleaned data")
 
-                if columns_result.get("success") and columns_result.get("columns"):
-                    available_columns = columns_result["columns"]
-                else:
-                    st.error("Failed to load columns from cleaned data")
-                    available_columns = []
+                available_columns = st.session_state.get('available_columns') or []
 
             except Exception as e:
                 st.error(f"Error loading columns: {str(e)}")
@@ -360,7 +407,7 @@ with col_main:
                     else:
                         with st.spinner("Analyzing column distribution for items NOT in target sheet..."):
                             # Analyze the selected column for items NOT in target sheet
-                            analysis_result = api_client.analyze_column_distribution_filtered(
+                            analysis_result = column_analysis_cached(
                                 st.session_state.file_id,
                                 st.session_state.master_sheet,
                                 st.session_state.target_sheet,
@@ -373,6 +420,7 @@ with col_main:
                                 add_log(f"Column analysis completed for: {selected_analysis_column}")
                                 st.rerun()
                             else:
+                                column_analysis_cached.clear()
                                 display_error_message("Column analysis failed", analysis_result.get("error"))
             else:
                 st.warning("No columns available for analysis (only YAZAKI PN found)")
@@ -397,20 +445,7 @@ with col_main:
             st.subheader("📊 Status Distribution (Items NOT in Target Sheet)")
 
             # Metrics in columns
-            col1, col2, col3, col4 = st.columns(4)
-
-            with col1:
-                st.metric("Status 'X'", analysis["distribution"].get("X", 0),
-                         help="Items with status 'X' that are not in target sheet")
-            with col2:
-                st.metric("Status 'D'", analysis["distribution"].get("D", 0),
-                         help="Items with status 'D' that are not in target sheet")
-            with col3:
-                st.metric("Status '0'", analysis["distribution"].get("0", 0),
-                         help="Items with status '0' that are not in target sheet")
-            with col4:
-                st.metric("Other/Empty", analysis["distribution"].get("OTHER", 0),
-                         help="Items with other/empty status that are not in target sheet")
+            display_metric_row(analysis["distribution"], FILTERED_DISTRIBUTION_METRICS)
 
             # Visual chart
             chart = create_distribution_chart(
@@ -420,11 +455,11 @@ with col_main:
             if chart:
                 st.plotly_chart(chart, use_container_width=True)
 
-            # Show detailed breakdown
+            # Show detailed breakdown; unlike a collapsed expander, the toggle leaves the table
+            # unbuilt and unsent until it is opened
             if analysis.get("detailed_breakdown"):
-                with st.expander("📋 Detailed Breakdown"):
-                    breakdown_df = pd.DataFrame(analysis["detailed_breakdown"])
-                    breakdown_df = fix_dataframe_types(breakdown_df)
+                if st.toggle("📋 Detailed Breakdown", key="show_analysis_breakdown"):
+                    breakdown_df = records_frame(analysis["detailed_breakdown"], "analysis_breakdown")
                     st.dataframe(breakdown_df, use_container_width=True)
 
     # Step 3.5: Process Pre-existing Items
@@ -469,6 +504,7 @@ with col_main:
                     if process_result.get("success"):
                         st.session_state.preexisting_result = process_result
                         st.session_state.current_step = 3.5
+                        st.session_state.pop('rollback_status', None)
                         add_log(f"Pre-existing items processed: {process_result['updated_count']} items updated")
                         display_success_message(process_result["message"])
                         st.rerun()
@@ -513,11 +549,12 @@ with col_main:
 
                 with col1:
                     st.write("**📊 Before Processing (Entire Master BOM)**")
-                    orig = result["original_distribution"]
-                    st.metric("Original 'X' Count", orig.get("X", 0))
-                    st.metric("Original 'D' Count", orig.get("D", 0))
-                    st.metric("Status '0'", orig.get("0", 0))
-                    st.metric("Other/Empty", orig.get("OTHER", 0))
+                    # Missing categories count as 0; merged once instead of per lookup
+                    orig = {**STATUS_COUNT_DEFAULTS, **result["original_distribution"]}
+                    st.metric("Original 'X' Count", orig["X"])
+                    st.metric("Original 'D' Count", orig["D"])
+                    st.metric("Status '0'", orig["0"])
+                    st.metric("Other/Empty", orig["OTHER"])
 
                     # Before processing pie chart
                     before_chart = create_distribution_chart(
@@ -528,16 +565,16 @@ with col_main:
 
                 with col2:
                     st.write("**📊 After Processing (Entire Master BOM)**")
-                    new = result["new_distribution"]
+                    new = {**STATUS_COUNT_DEFAULTS, **result["new_distribution"]}
 
                     # Calculate deltas
-                    x_delta = new.get("X", 0) - orig.get("X", 0)
-                    d_delta = new.get("D", 0) - orig.get("D", 0)
+                    x_delta = new["X"] - orig["X"]
+                    d_delta = new["D"] - orig["D"]
 
-                    st.metric("New 'X' Count", new.get("X", 0), delta=x_delta)
-                    st.metric("New 'D' Count", new.get("D", 0), delta=d_delta)
-                    st.metric("Status '0'", new.get("0", 0))
-                    st.metric("Other/Empty", new.get("OTHER", 0))
+                    st.metric("New 'X' Count", new["X"], delta=x_delta)
+                    st.metric("New 'D' Count", new["D"], delta=d_delta)
+                    st.metric("Status '0'", new["0"])
+                    st.metric("Other/Empty", new["OTHER"])
 
                     # After processing pie chart
                     after_chart = create_distribution_chart(
@@ -552,21 +589,13 @@ with col_main:
                 # Fallback to simple display if original distribution not available
                 st.subheader("📈 Updated Distribution")
 
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("New 'X' Count", result["new_distribution"].get("X", 0))
-                with col2:
-                    st.metric("New 'D' Count", result["new_distribution"].get("D", 0))
-                with col3:
-                    st.metric("Status '0'", result["new_distribution"].get("0", 0))
-                with col4:
-                    st.metric("Other/Empty", result["new_distribution"].get("OTHER", 0))
+                display_metric_row(result["new_distribution"], NEW_DISTRIBUTION_METRICS)
 
             # Show preview of updated items
             if result.get("updated_items_preview"):
-                with st.expander(f"📋 Preview of Updated Items ({len(result['updated_items_preview'])} shown)"):
-                    preview_df = pd.DataFrame(result["updated_items_preview"])
-                    preview_df = fix_dataframe_types(preview_df)
+                if st.toggle(f"📋 Preview of Updated Items ({len(result['updated_items_preview'])} shown)",
+                             key="show_updated_items"):
+                    preview_df = records_frame(result["updated_items_preview"], "updated_items")
                     st.dataframe(preview_df, use_container_width=True)
 
             # Rollback and Continue options
@@ -574,7 +603,7 @@ with col_main:
 
             with col1:
                 # Check rollback availability
-                rollback_status = api_client.get_rollback_status(st.session_state.file_id)
+                rollback_status = rollback_status_cached(st.session_state.file_id)
                 if rollback_status.get("rollback_available", False):
                     if st.button("🔄 Rollback Changes", type="secondary", help="Restore Master BOM to state before processing"):
                         with st.spinner("Rolling back changes..."):
@@ -587,6 +616,7 @@ with col_main:
                                 # Clear the processing result to hide the section
                                 if 'preexisting_result' in st.session_state:
                                     del st.session_state['preexisting_result']
+                                st.session_state.pop('rollback_status', None)
 
                                 add_log(f"Rollback completed: {rollback_result['message']}")
                                 display_success_message("Rollback completed successfully")
@@ -611,7 +641,7 @@ with col_main:
         # Get available columns automatically
         if not st.session_state.get('available_columns'):
             with st.spinner("Loading available columns..."):
-                columns_result = api_client.get_lookup_columns(
+                columns_result = lookup_columns_cached(
                     st.session_state.file_id,
                     st.session_state.master_sheet
                 )
@@ -620,6 +650,7 @@ with col_main:
                     st.session_state.available_columns = columns_result["columns"]
                     add_log("Loaded available columns for LOCKUP")
                 else:
+                    lookup_columns_cached.clear()
                     display_error_message("Failed to load columns", columns_result.get("error"))
 
         # Column selection only
@@ -648,7 +679,6 @@ with col_main:
                         st.session_state.current_step = 5
                         add_log(f"LOCKUP completed using column: {lookup_column}")
                         display_success_message(lookup_result["message"])
-                        st.rerun()
                     else:
                         display_error_message("LOCKUP failed", lookup_result.get("error"))
 
@@ -661,36 +691,46 @@ with col_main:
         # Display KPIs
         display_kpi_metrics(result["kpi_counts"], result["total_records"])
 
-        # Display chart
-        chart = create_status_chart(result["kpi_counts"])
-        if chart:
-            st.plotly_chart(chart, use_container_width=True)
+        # Chart and table sit behind toggles: reruns driven by earlier steps skip building
+        # the figure and the results frame until they are opened
+        if st.toggle("📊 Status Chart", key="show_status_chart"):
+            chart = create_status_chart(result["kpi_counts"])
+            if chart:
+                st.plotly_chart(chart, use_container_width=True)
 
         # Display results table with search
         st.subheader("📋 Processed Data")
         if result["result_preview"]:
-            df = pd.DataFrame(result["result_preview"])
-            display_dataframe_with_search(df, "results")
+            if st.toggle(f"📋 Show Processed Data ({len(result['result_preview'])} rows shown)", key="show_results"):
+                df = records_frame(result["result_preview"], "results")
+                display_dataframe_with_search(df, "results", fix_types=False)
 
         # Download section
         st.subheader("📥 Download Results")
-        download_filename = f"processed_{st.session_state.target_sheet}.csv"
+        # Parquet and Arrow IPC skip the backend's per-cell CSV formatting and are smaller to transfer
+        download_format = st.radio("Format", list(DOWNLOAD_FORMATS), horizontal=True, key="download_format")
+        file_format, download_mime = DOWNLOAD_FORMATS[download_format]
+        download_filename = f"processed_{st.session_state.target_sheet}.{file_format}"
 
         if st.button("📥 Download Complete Dataset", type="primary"):
             with st.spinner("Preparing download..."):
-                download_data = api_client.download_data(
+                # Streamed to a temporary file instead of being buffered in the response;
+                # st.download_button still loads the file into memory
+                download_file = api_client.download_to_file(
                     st.session_state.file_id,
-                    st.session_state.target_sheet
+                    st.session_state.target_sheet,
+                    file_format=file_format
                 )
 
-                if download_data:
-                    st.download_button(
-                        label="📥 Download CSV File",
-                        data=download_data,
-                        file_name=download_filename,
-                        mime="text/csv",
-                        help="Download the complete processed dataset"
-                    )
+                if download_file:
+                    with download_file:
+                        st.download_button(
+                            label=f"📥 Download {download_format} File",
+                            data=download_file,
+                            file_name=download_filename,
+                            mime=download_mime,
+                            help="Download the complete processed dataset"
+                        )
                     add_log(f"Dataset ready for download: {download_filename}")
                 else:
                     st.error("Failed to prepare download")
@@ -706,15 +746,7 @@ with col_main:
 
         status_counts = result["kpi_counts"]
 
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Status 'X' (No Update)", status_counts.get('X', 0), help="Records that will not be updated")
-        with col2:
-            st.metric("Status 'D' (Update)", status_counts.get('D', 0), help="Records that will update existing entries")
-        with col3:
-            st.metric("Status '0' (Check/Insert)", status_counts.get('0', 0), help="Records to check for duplicates or insert")
-        with col4:
-            st.metric("Not Found (Insert)", status_counts.get('NOT_FOUND', 0), help="Records to insert as new entries")
+        display_metric_row(status_counts, UPDATE_OPERATION_METRICS)
 
         # Process updates button
         if st.button("🔄 Process Master BOM Updates", type="primary"):
@@ -742,41 +774,35 @@ with col_main:
         update_result = st.session_state.update_result
 
         # Show update statistics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Records Updated", update_result.get("updated_count", 0))
-        with col2:
-            st.metric("Records Inserted", update_result.get("inserted_count", 0))
-        with col3:
-            st.metric("Duplicates Found", update_result.get("duplicates_count", 0))
-        with col4:
-            st.metric("Skipped (X status)", update_result.get("skipped_count", 0))
+        display_metric_row(update_result, UPDATE_RESULT_METRICS)
 
         # Show duplicates if any
         if update_result.get("duplicates") and len(update_result["duplicates"]) > 0:
             st.subheader("⚠️ Duplicate Records Found")
             st.warning("The following records were found to be duplicates and require review:")
 
-            duplicates_df = pd.DataFrame(update_result["duplicates"])
-            display_dataframe_with_search(duplicates_df, "duplicates")
+            if st.toggle(f"📋 Show Duplicate Records ({len(update_result['duplicates'])})", key="show_duplicates"):
+                duplicates_df = records_frame(update_result["duplicates"], "duplicates")
+                display_dataframe_with_search(duplicates_df, "duplicates", fix_types=False)
 
         # Download updated Master BOM
         st.subheader("📥 Download Updated Master BOM")
         if st.button("📥 Download Updated Master BOM", type="primary"):
             with st.spinner("Preparing updated Master BOM..."):
-                download_data = api_client.download_data(
+                download_file = api_client.download_to_file(
                     st.session_state.file_id,
                     st.session_state.master_sheet
                 )
 
-                if download_data:
-                    st.download_button(
-                        label="📥 Download Updated Master BOM",
-                        data=download_data,
-                        file_name=f"updated_{st.session_state.master_sheet}.csv",
-                        mime="text/csv",
-                        help="Download the updated Master BOM with all changes applied"
-                    )
+                if download_file:
+                    with download_file:
+                        st.download_button(
+                            label="📥 Download Updated Master BOM",
+                            data=download_file,
+                            file_name=f"updated_{st.session_state.master_sheet}.csv",
+                            mime="text/csv",
+                            help="Download the updated Master BOM with all changes applied"
+                        )
                     add_log(f"Updated Master BOM ready for download")
                 else:
                     st.error("Failed to prepare Master BOM download")
@@ -2,21 +2,65 @@
 Reusable UI components for the Streamlit frontend
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Dict, List, Any
-import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from itertools import groupby, islice
+import re
+import time
+
+# Session logs kept in memory; older entries are dropped as new ones arrive
+SESSION_LOG_LIMIT = 200
+
+
+# Search terms containing any of these are treated as regular expressions
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+# Second of the last log timestamp and its formatted text, reused within the same second
+_log_clock = [-1, ""]
+
+
+def new_log_buffer() -> deque:
+    """Bounded buffer for session logs"""
+    return deque(maxlen=SESSION_LOG_LIMIT)
 
 
 def add_log(message: str):
     """Add a timestamped log entry"""
     if 'logs' not in st.session_state:
-        st.session_state.logs = []
+        st.session_state.logs = new_log_buffer()
     
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    st.session_state.logs.append(f"[{timestamp}] {message}")
+    now = int(time.time())
+    if now != _log_clock[0]:
+        _log_clock[0], _log_clock[1] = now, time.strftime("%H:%M:%S", time.localtime(now))
+    st.session_state.logs.append(f"[{_log_clock[1]}] {message}")
+
+
+def _log_level(log: str) -> str:
+    """Sidebar colour of a log entry"""
+    if "ERROR" in log or "❌" in log:
+        return "error"
+    if "SUCCESS" in log or "✅" in log:
+        return "success"
+    if "WARNING" in log or "⚠️" in log:
+        return "warning"
+    return "info"
+
+
+_LOG_ELEMENTS = {
+    "error": (st.error, "❌"),
+    "success": (st.success, "✅"),
+    "warning": (st.warning, "⚠️"),
+    "info": (st.info, "ℹ️"),
+}
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def backend_status() -> Tuple[bool, Dict[str, Any]]:
+    """Backend health and log counts, fetched together and shared by the reruns of a few seconds"""
+    from api_client import api_client
+    return api_client.backend_status()
 
 
 def display_logs():
@@ -33,25 +77,18 @@ def display_logs():
             total_logs = len(st.session_state.logs)
             st.caption(f"📊 Showing last 15 of {total_logs} session logs")
 
-            # Show last 15 logs in reverse order (newest first)
-            for log in reversed(st.session_state.logs[-15:]):
-                # Color code different log types
-                if "ERROR" in log or "❌" in log:
-                    st.error(log, icon="❌")
-                elif "SUCCESS" in log or "✅" in log:
-                    st.success(log, icon="✅")
-                elif "WARNING" in log or "⚠️" in log:
-                    st.warning(log, icon="⚠️")
-                else:
-                    st.info(log, icon="ℹ️")
+            # Show last 15 logs in reverse order (newest first), color coded by type;
+            # consecutive logs of one type share a single element
+            for level, group in groupby(islice(reversed(st.session_state.logs), 15), key=_log_level):
+                element, icon = _LOG_ELEMENTS[level]
+                element("  \n".join(group), icon=icon)
         else:
             st.info("No activity yet...", icon="📝")
 
         # View all session logs
         if st.session_state.get('logs', []) and len(st.session_state.logs) > 15:
             with st.expander(f"📜 View All {len(st.session_state.logs)} Session Logs"):
-                for log in reversed(st.session_state.logs):
-                    st.text(log)
+                st.text("\n".join(reversed(st.session_state.logs)))
 
         # Log Export Section
         st.markdown("---")
@@ -59,7 +96,7 @@ def display_logs():
         st.caption("Export detailed backend logs including LOCKUP process details")
 
         # Get log summary from backend
-        log_summary = api_client.get_log_summary()
+        _, log_summary = backend_status()
 
         if log_summary.get("session_logs_count", 0) > 0:
             # Show log statistics
@@ -100,6 +137,7 @@ def display_logs():
             if st.button("🗑️ Clear Backend Logs", type="secondary", key="clear_backend_logs"):
                 clear_result = api_client.clear_logs()
                 if clear_result.get("success"):
+                    backend_status.clear()
                     add_log("Backend logs cleared")
                     st.success("Backend logs cleared successfully")
                     st.rerun()
@@ -110,31 +148,88 @@ def display_logs():
 
         # Clear session logs button
         if st.button("🗑️ Clear Session Logs", key="clear_session_logs"):
-            st.session_state.logs = []
+            st.session_state.logs = new_log_buffer()
             add_log("Session logs cleared")
             st.rerun()
 
 
+# Page styles, kept here so they are built once per process rather than on every rerun
+CUSTOM_CSS = """
+<style>
+    .main-header {
+        font-size: 2.5rem;
+        color: #1f77b4;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .step-header {
+        font-size: 1.5rem;
+        color: #2e8b57;
+        border-bottom: 2px solid #2e8b57;
+        padding-bottom: 0.5rem;
+        margin: 1rem 0;
+    }
+    .metric-container {
+        background-color: #f0f2f6;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0;
+    }
+    .success-box {
+        background-color: #d4edda;
+        border: 1px solid #c3e6cb;
+        border-radius: 0.25rem;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+</style>
+"""
+
+
+@st.cache_resource
+def _minified_css() -> str:
+    """CUSTOM_CSS with its indentation and line breaks collapsed"""
+    return re.sub(r"\s*\n\s*", "", CUSTOM_CSS)
+
+
+def inject_custom_css():
+    """Add the page styles (Streamlit needs them on every run)"""
+    st.markdown(_minified_css(), unsafe_allow_html=True)
+
+
+# (label, count key, help) for each metric of the activation status KPI row
+KPI_METRICS = [
+    ("Status '0'", '0', None),
+    ("Status 'D'", 'D', None),
+    ("Status 'X'", 'X', None),
+    ("Not Found", 'NOT_FOUND', None),
+]
+
+
+def display_metric_row(counts: Dict[str, Any], spec: List[Tuple[str, str, Optional[str]]]):
+    """Display one st.metric per (label, key, help) entry of spec, side by side"""
+    for col, (label, key, help_text) in zip(st.columns(len(spec)), spec):
+        col.metric(label, counts.get(key, 0), help=help_text)
+
+
 def display_kpi_metrics(kpi_counts: Dict[str, int], total_records: int):
     """Display KPI metrics in columns"""
     st.subheader("📊 Activation Status KPIs")
     
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Total Records", total_records)
-    with col2:
-        st.metric("Status '0'", kpi_counts.get('0', 0))
-    with col3:
-        st.metric("Status 'D'", kpi_counts.get('D', 0))
-    with col4:
-        st.metric("Status 'X'", kpi_counts.get('X', 0))
-    with col5:
-        st.metric("Not Found", kpi_counts.get('NOT_FOUND', 0))
+    display_metric_row(
+        {"TOTAL": total_records, **kpi_counts}, [("Total Records", "TOTAL", None)] + KPI_METRICS
+    )
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_status_chart(kpi_counts: Dict[str, int]):
-    """Create a bar chart for activation status distribution"""
+    """
+    Create a bar chart for activation status distribution
+    Chart builders are cached on their input counts; every call gets its own copy of the figure.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     if not kpi_counts:
         return None
 
@@ -171,41 +266,114 @@ def create_status_chart(kpi_counts: Dict[str, int]):
     return fig
 
 
+# Stringified missing values, shown as empty cells
+_NULL_STRINGS = ['nan', 'None', 'NaN']
+
+
 def fix_dataframe_types(df: pd.DataFrame) -> pd.DataFrame:
     """Fix DataFrame data types to prevent PyArrow serialization errors"""
-    df = df.copy()
-
-    for col in df.columns:
-        # Convert all object columns to string to avoid mixed type issues
-        if df[col].dtype == 'object':
-            # Handle mixed types by converting everything to string
-            df[col] = df[col].astype(str)
-            # Replace 'nan' strings with empty strings for cleaner display
-            df[col] = df[col].replace(['nan', 'None', 'NaN'], '')
-
-        # Handle numeric columns that might have mixed types
-        elif df[col].dtype in ['int64', 'float64']:
-            # Ensure numeric columns are properly typed
-            try:
-                # Try to convert to numeric, coercing errors to NaN
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                # Fill NaN with 0 for display purposes
-                df[col] = df[col].fillna(0)
-            except:
-                # If conversion fails, convert to string
-                df[col] = df[col].astype(str)
+    # Shallow copy: every change below replaces whole columns, so the untouched
+    # columns keep sharing memory with the caller's frame instead of being duplicated
+    df = df.copy(deep=False)
+
+    # Column dtypes are read once; numeric columns are converted together
+    dtypes = df.dtypes
+    object_cols = [col for col, dtype in dtypes.items() if dtype == 'object']
+    numeric_cols = [col for col, dtype in dtypes.items() if dtype in ['int64', 'float64']]
+
+    # Convert object columns to string to avoid mixed type issues, then replace
+    # 'nan' strings with empty strings for cleaner display
+    for col in object_cols:
+        column = df[col]
+        if pd.api.types.infer_dtype(column, skipna=False) != 'string':
+            df[col] = column.astype(str).replace(_NULL_STRINGS, '')
+        else:
+            # Already all strings (the usual case for JSON payloads): no per-value str(),
+            # and the column is only rewritten when it holds one of the null strings
+            null_strings = column.isin(_NULL_STRINGS)
+            if null_strings.any():
+                df[col] = column.mask(null_strings, '')
+
+    # Numeric columns are already properly typed; fill NaN with 0 for display purposes
+    if numeric_cols:
+        df[numeric_cols] = df[numeric_cols].fillna(0)
 
     return df
 
 
-def display_dataframe_with_search(df: pd.DataFrame, key: str):
-    """Display dataframe with search functionality"""
+def records_frame(records: List[Dict[str, Any]], key: str) -> pd.DataFrame:
+    """
+    Display-ready DataFrame for an API records payload, built once per payload
+    The frame is kept in session state and reused on every rerun until the payload
+    object is replaced; callers must treat it as read-only.
+    """
+    frames = st.session_state.setdefault("_records_frames", {})
+    cached = frames.get(key)
+    if cached is None or cached[0] is not records:
+        # Arrow-backed columns are smaller than object columns and are handed to
+        # st.dataframe's Arrow serialization without a per-value conversion
+        frame = fix_dataframe_types(pd.DataFrame(records)).convert_dtypes(dtype_backend="pyarrow")
+        cached = (records, frame)
+        frames[key] = cached
+    return cached[1]
+
+
+def search_mask(df: pd.DataFrame, search_term: str) -> np.ndarray:
+    """
+    Rows containing the search term in any column (case-insensitive)
+    Plain text is matched literally (no regex engine); terms with regex metacharacters
+    are matched as a pattern, or literally if they are not a valid one.
+    """
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=bool)
+
+    # Factorize every column and pool the distinct values of all columns, so the whole
+    # frame is searched with a single string scan; each column's slot after its uniques
+    # holds a representative of its missing values (code -1)
+    column_codes = []
+    labels = []
+    offset = 0
+    for _, column in df.items():
+        codes, uniques = pd.factorize(column)
+        if column.dtype == object and pd.api.types.infer_dtype(uniques, skipna=True) != "string":
+            # Mixed objects can hash equal across types (1, 1.0, True) yet print differently,
+            # so only those columns are stringified in full before factorizing
+            column = column.astype(str)
+            codes, uniques = pd.factorize(column)
+        missing = column[codes == -1].head(1)
+        labels.append(pd.Series(uniques).astype(str))
+        labels.append(missing.astype(str) if len(missing) else pd.Series([""]))
+        column_codes.append((np.where(codes == -1, len(uniques), codes) + offset, offset, offset + len(uniques) + 1))
+        offset += len(uniques) + 1
+
+    labels = pd.concat(labels, ignore_index=True)
+    regex = _REGEX_META.search(search_term) is not None
+    try:
+        hits = labels.str.contains(search_term, case=False, regex=regex, na=False)
+    except (re.error, ValueError):
+        hits = labels.str.contains(search_term, case=False, regex=False, na=False)
+    hits = hits.to_numpy(dtype=bool)
+
+    # OR the columns into one mask in place, reusing a single gather buffer and skipping
+    # columns none of whose values matched
+    mask = np.zeros(len(df), dtype=bool)
+    column_hits = np.empty(len(df), dtype=bool)
+    for codes, start, stop in column_codes:
+        if hits[start:stop].any():
+            np.take(hits, codes, out=column_hits)
+            mask |= column_hits
+    return mask
+
+
+def display_dataframe_with_search(df: pd.DataFrame, key: str, fix_types: bool = True):
+    """Display dataframe with search functionality (fix_types=False for frames from records_frame)"""
     if df.empty:
         st.warning("No data to display")
         return
 
     # Fix data types for Arrow compatibility
-    df = fix_dataframe_types(df)
+    if fix_types:
+        df = fix_dataframe_types(df)
 
     # Search functionality
     search_term = st.text_input(
@@ -217,10 +385,7 @@ def display_dataframe_with_search(df: pd.DataFrame, key: str):
     # Filter dataframe based on search
     if search_term:
         # Create a mask for rows containing the search term in any column
-        mask = df.astype(str).apply(
-            lambda x: x.str.contains(search_term, case=False, na=False)
-        ).any(axis=1)
-        filtered_df = df[mask]
+        filtered_df = df[search_mask(df, search_term)]
 
         if filtered_df.empty:
             st.warning(f"No results found for '{search_term}'")
@@ -237,8 +402,12 @@ def display_dataframe_with_search(df: pd.DataFrame, key: str):
     st.dataframe(filtered_df, use_container_width=True, height=400)
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_distribution_chart(distribution: Dict[str, int], title: str = "Status Distribution"):
     """Create a bar chart with line overlay for status distribution"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if not distribution or sum(distribution.values()) == 0:
         return None
 
@@ -318,8 +487,12 @@ def create_distribution_chart(distribution: Dict[str, int], title: str = "Status
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_comparison_chart(original_dist: Dict[str, int], new_dist: Dict[str, int]):
     """Create a comparison chart with bars and line overlay showing before vs after"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if not original_dist or not new_dist:
         return None
 
@@ -411,10 +584,21 @@ def create_processing_flow_chart(processing_stats: Dict[str, Any]):
     if not processing_stats:
         return None
 
+    # Only the three counts key the figure cache, not the whole response with its
+    # record previews, which Streamlit would otherwise hash on every rerun
+    return _processing_flow_figure(
+        processing_stats.get("total_checked", 0),
+        processing_stats.get("not_in_target_count", 0),
+        processing_stats.get("updated_count", 0)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _processing_flow_figure(total_checked: int, not_in_target: int, updated_count: int):
+    """Build the processing flow bar chart for the given counts"""
+    import plotly.graph_objects as go
+
     # Prepare data for processing flow
-    total_checked = processing_stats.get("total_checked", 0)
-    not_in_target = processing_stats.get("not_in_target_count", 0)
-    updated_count = processing_stats.get("updated_count", 0)
     in_target = total_checked - not_in_target
     other_status = not_in_target - updated_count
 
@@ -496,6 +680,8 @@ def create_processing_flow_chart(processing_stats: Dict[str, Any]):
 
 def create_trend_analysis_chart(data_series: List[Dict[str, Any]], title: str = "Trend Analysis"):
     """Create a line chart with dots for trend analysis"""
+    import plotly.graph_objects as go
+
     if not data_series:
         return None
 
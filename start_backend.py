@@ -20,16 +20,22 @@ if __name__ == "__main__":
         print("Please ensure the backend directory structure is correct.")
         sys.exit(1)
 
+    # Use the current Python executable to ensure correct environment
+    args = [
+        sys.executable, "-m", "uvicorn",
+        "backend.main:app",
+        "--host", "0.0.0.0",
+        "--port", "8000",
+    ]
+    if os.getenv("ETL_ENV") == "production":
+        # No reload watcher; uvloop/httptools come with uvicorn[standard]. Uploads and
+        # sessions live in process memory, so the server stays a single worker.
+        args += ["--loop", "uvloop", "--http", "httptools", "--no-access-log"]
+    else:
+        args += ["--reload", "--reload-dir", "backend"]
+
     try:
-        # Use the current Python executable to ensure correct environment
-        subprocess.run([
-            sys.executable, "-m", "uvicorn",
-            "backend.main:app",
-            "--host", "0.0.0.0",
-            "--port", "8000",
-            "--reload",
-            "--reload-dir", "backend"
-        ])
+        subprocess.run(args)
     except KeyboardInterrupt:
         print("\n👋 Backend server stopped")
     except Exception as e:
@@ -7,6 +7,7 @@ import subprocess
 import sys
 import time
 import requests
+from requests.adapters import HTTPAdapter
 
 st.set_page_config(
     page_title="ETL Tool Launcher",
@@ -17,18 +18,28 @@ st.set_page_config(
 st.title("🚀 ETL Automation Tool v2.0 Launcher")
 st.markdown("---")
 
+# One keep-alive session for the status checks, kept across reruns of this script
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+    return session
+
+# Service checks are shared by the reruns of a few seconds (each can wait up to 2s)
 # Check if backend is running
+@st.cache_data(ttl=10, show_spinner=False)
 def check_backend():
     try:
-        response = requests.get("http://localhost:8000/", timeout=2)
+        response = get_http_session().get("http://localhost:8000/", timeout=2)
         return response.status_code == 200
     except:
         return False
 
 # Check if frontend is running
+@st.cache_data(ttl=10, show_spinner=False)
 def check_frontend():
     try:
-        response = requests.get("http://localhost:8501/", timeout=2)
+        response = get_http_session().get("http://localhost:8501/", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -76,6 +87,7 @@ with col2:
             subprocess.Popen([sys.executable, "start_backend.py"])
             st.success("✅ Backend starting...")
             time.sleep(2)
+            check_backend.clear()
             st.rerun()
         except Exception as e:
             st.error(f"❌ Backend start failed: {e}")
@@ -86,6 +98,7 @@ with col3:
             subprocess.Popen([sys.executable, "start_frontend.py"])
             st.success("✅ Frontend starting...")
             time.sleep(2)
+            check_frontend.clear()
             st.rerun()
         except Exception as e:
             st.error(f"❌ Frontend start failed: {e}")
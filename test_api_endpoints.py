@@ -8,10 +8,13 @@ import json
 
 BASE_URL = "http://localhost:8000"
 
+# One keep-alive connection pool for every request in this script
+session = requests.Session()
+
 def test_health():
     """Test health endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/")
+        response = session.get(f"{BASE_URL}/")
         print(f"✅ Health check: {response.status_code} - {response.json()}")
         return True
     except Exception as e:
@@ -29,7 +32,7 @@ def test_session_endpoints():
     
     for endpoint, data in endpoints:
         try:
-            response = requests.post(
+            response = session.post(
                 f"{BASE_URL}{endpoint}",
                 headers={"Content-Type": "application/json"},
                 json=data
@@ -13,10 +13,13 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 BASE_URL = "http://localhost:8000"
 
+# One keep-alive connection pool for every request in this script
+session = requests.Session()
+
 def test_api_health():
     """Test if the API is running"""
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = session.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print("✅ API Health Check: PASSED")
             return True
@@ -30,7 +33,7 @@ def test_api_health():
 def test_dashboard_data():
     """Test the dashboard data endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/dashboard/data")
+        response = session.get(f"{BASE_URL}/dashboard/data")
         
         if response.status_code == 200:
             data = response.json()
@@ -55,7 +58,7 @@ def test_dashboard_data():
 def test_bom_analysis():
     """Test the BOM analysis endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/bom/analysis")
+        response = session.get(f"{BASE_URL}/bom/analysis")
         
         if response.status_code == 200:
             data = response.json()
@@ -78,8 +81,8 @@ def test_file_upload():
     """Test file upload to enable dashboard endpoints"""
     try:
         # Create a simple test Excel file
+        import io
         import pandas as pd
-        import tempfile
         
         # Create sample data
         master_bom_data = {
@@ -100,24 +103,24 @@ def test_file_upload():
             'Last Updated': ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04']
         }
         
-        # Create temporary Excel file
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp_file:
-            with pd.ExcelWriter(tmp_file.name, engine='openpyxl') as writer:
-                pd.DataFrame(master_bom_data).to_excel(writer, sheet_name='MasterBOM', index=False)
-                pd.DataFrame(status_data).to_excel(writer, sheet_name='Status', index=False)
-            
-            # Upload the file
-            with open(tmp_file.name, 'rb') as f:
-                files = {'file': ('test_data.xlsx', f, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
-                response = requests.post(f"{BASE_URL}/upload", files=files)
-                
-                if response.status_code == 200:
-                    print("✅ Test File Upload: PASSED")
-                    return True
-                else:
-                    print(f"❌ Test File Upload: FAILED (Status: {response.status_code})")
-                    print(f"   Response: {response.text}")
-                    return False
+        # Build the Excel file in memory
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            pd.DataFrame(master_bom_data).to_excel(writer, sheet_name='MasterBOM', index=False)
+            pd.DataFrame(status_data).to_excel(writer, sheet_name='Status', index=False)
+        buffer.seek(0)
+
+        # Upload the file
+        files = {'file': ('test_data.xlsx', buffer, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+        response = session.post(f"{BASE_URL}/upload", files=files)
+
+        if response.status_code == 200:
+            print("✅ Test File Upload: PASSED")
+            return True
+        else:
+            print(f"❌ Test File Upload: FAILED (Status: {response.status_code})")
+            print(f"   Response: {response.text}")
+            return False
         
     except Exception as e:
         print(f"❌ Test File Upload: FAILED (Error: {str(e)})")
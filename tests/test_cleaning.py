@@ -0,0 +1,43 @@
+"""
+Tests for the string column cleaning paths in backend.core.cleaning
+"""
+import logging
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from backend.core import cleaning
+from backend.core._str_kernels import NUMBA_AVAILABLE
+
+logging.disable(logging.CRITICAL)
+
+VALUES = pd.Series([" 'A1' ", '"B+2"', None, "nan", "C 3", "", "None", "plain"] * 4, dtype=object)
+EXPECTED = ["A1", "B2", "", "", "C3", "", "", "plain"] * 4
+
+
+def python_strip_quotes_plus_space(series):
+    """Stand-in for the Numba kernel, returning python-backed strings as it does on pandas 2"""
+    return series.astype("string[python]").fillna("").str.replace(r"['\"+ ]+", "", regex=True).str.strip()
+
+
+class CleanStringColumnTests(unittest.TestCase):
+
+    def clean(self, kernel):
+        with mock.patch.object(cleaning, "KERNEL_MIN_ROWS", 0 if kernel else len(VALUES) + 1):
+            return cleaning._clean_string_column(VALUES.copy())
+
+    def test_vectorized_path(self):
+        self.assertEqual(self.clean(kernel=False).tolist(), EXPECTED)
+
+    def test_kernel_result_has_the_vectorized_dtype(self):
+        with mock.patch.object(cleaning, "strip_quotes_plus_space", python_strip_quotes_plus_space):
+            pd.testing.assert_series_equal(self.clean(kernel=True), self.clean(kernel=False))
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "numba is not installed")
+    def test_kernel_and_vectorized_paths_agree(self):
+        pd.testing.assert_series_equal(self.clean(kernel=True), self.clean(kernel=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the download serializers in backend.main (streamed CSV, Parquet and Arrow IPC)
+"""
+import io
+import logging
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.main import dataframe_to_columnar_bytes, dataframe_to_csv_bytes, iter_csv_chunks
+
+logging.disable(logging.CRITICAL)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+ROWS = 60_000  # several download blocks at the default block size for 5 columns
+
+
+def mixed_frame(rows=ROWS):
+    """Text, float with NaN, int, mixed-type object and datetime columns"""
+    positions = np.arange(rows)
+    # to_csv only writes the time of day for chunks that have one: a single row with a time
+    # makes a misaligned block disagree with the surrounding to_csv chunk
+    stamps = pd.Series(pd.Timestamp("2024-01-01") + pd.to_timedelta(positions // 1000, unit="D"))
+    stamps[positions == 44_999] += pd.Timedelta(hours=10, minutes=30)
+    stamps[positions % 7 == 0] = pd.NaT
+    return pd.DataFrame({
+        "YAZAKI PN": np.where(positions % 11 == 0, None, "PN-" + pd.Series(positions).astype(str)),
+        "QTY": np.where(positions % 5 == 0, np.nan, positions / 4),
+        "COUNT": positions,
+        "MIXED": pd.Series([1, "x, y", 2.5, None, 'say "hi"'] * (rows // 5), dtype=object),
+        "WHEN": stamps,
+    })
+
+
+class CsvDownloadTests(unittest.TestCase):
+
+    def test_stream_matches_to_csv(self):
+        df = mixed_frame()
+        blocks = list(iter_csv_chunks(df))
+        self.assertGreater(len(blocks), 2)
+        self.assertEqual(b"".join(blocks), df.to_csv(index=False).encode("utf-8"))
+
+    def test_empty_frame(self):
+        df = mixed_frame().iloc[:0]
+        self.assertEqual(b"".join(iter_csv_chunks(df)), df.to_csv(index=False).encode("utf-8"))
+
+    def test_csv_bytes_match_to_csv(self):
+        df = mixed_frame(100)
+        self.assertEqual(dataframe_to_csv_bytes(df), df.to_csv(index=False).encode("utf-8"))
+        self.assertEqual(dataframe_to_csv_bytes(df, include_header=False),
+                         df.to_csv(index=False, header=False).encode("utf-8"))
+
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+class ColumnarDownloadTests(unittest.TestCase):
+
+    def setUp(self):
+        # Columnar formats need one type per column: the mixed object column stays CSV-only
+        self.df = mixed_frame(1_000).drop(columns="MIXED")
+
+    def test_parquet_round_trip(self):
+        content = dataframe_to_columnar_bytes(self.df, "parquet")
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(content)), self.df, check_dtype=False)
+
+    def test_arrow_round_trip(self):
+        content = dataframe_to_columnar_bytes(self.df, "arrow")
+        pd.testing.assert_frame_equal(pd.read_feather(io.BytesIO(content)), self.df, check_dtype=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
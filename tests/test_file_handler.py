@@ -0,0 +1,74 @@
+"""
+Tests for upload parsing in backend.core.file_handler
+"""
+import logging
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from backend.core import file_handler
+from backend.core.file_handler import file_manager
+
+logging.disable(logging.CRITICAL)
+
+ROWS = 1_000
+
+
+def csv_bytes():
+    """Text with blanks, float with NaN, int, date and timestamp columns"""
+    positions = np.arange(ROWS)
+    return pd.DataFrame({
+        "YAZAKI PN": np.where(positions % 11 == 0, None, "PN-" + pd.Series(positions).astype(str)),
+        "QTY": np.where(positions % 5 == 0, np.nan, positions / 4),
+        "COUNT": positions,
+        "DAY": pd.Timestamp("2024-01-01") + pd.to_timedelta(positions % 30, unit="D"),
+        "WHEN": pd.Timestamp("2024-01-05 10:00") + pd.to_timedelta(positions, unit="min"),
+    }).to_csv(index=False).encode("utf-8")
+
+
+class ReadCsvTests(unittest.TestCase):
+
+    def test_chunked_and_whole_file_reads_agree(self):
+        content = csv_bytes()
+        whole = file_manager._load_file(content, "bom.csv")["Sheet1"]
+        with mock.patch.object(file_handler, "LARGE_CSV_BYTES", 0), \
+                mock.patch.object(file_handler, "CSV_CHUNK_SIZE", 128):
+            chunked = file_manager._load_file(content, "bom.csv")["Sheet1"]
+        pd.testing.assert_frame_equal(chunked, whole)
+        # Dates are left as text on both paths (cleaning treats them as strings)
+        self.assertFalse(any(dtype.kind == "M" for dtype in whole.dtypes))
+
+
+class ParsedCacheTests(unittest.TestCase):
+
+    def upload(self, content):
+        file_id = file_manager.save_uploaded_file(content, "bom.csv")
+        self.addCleanup(file_manager.cleanup_file, file_id)
+        return file_id
+
+    @staticmethod
+    def cached_hashes():
+        return {content_hash for content_hash, _ in file_manager.parsed_cache}
+
+    def test_identical_uploads_share_parsed_sheets(self):
+        content = csv_bytes()
+        first, second = self.upload(content), self.upload(content)
+        self.assertIs(file_manager.get_sheet(first, "Sheet1", copy=False),
+                      file_manager.get_sheet(second, "Sheet1", copy=False))
+        self.assertIsNot(file_manager.get_sheet(first, "Sheet1"), file_manager.get_sheet(second, "Sheet1"))
+
+    def test_cleanup_evicts_parsed_sheets_of_the_last_upload(self):
+        content = csv_bytes()
+        first, second = self.upload(content), self.upload(content)
+        content_hash = file_manager.files_storage[first]["content_hash"]
+
+        file_manager.cleanup_file(first)
+        self.assertIn(content_hash, self.cached_hashes())
+        file_manager.cleanup_file(second)
+        self.assertNotIn(content_hash, self.cached_hashes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for the LOCKUP key probe back-ends in backend.core.preprocessing
+
+Every engine (pandas index, Arrow index_in, Polars join) must give the same result.
+"""
+import logging
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from backend.core import preprocessing
+from backend.core.preprocessing import DataProcessor
+
+logging.disable(logging.CRITICAL)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import polars  # noqa: F401
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+KEY = "YAZAKI PN"
+LOOKUP = "STATUS"
+
+# Duplicate master key (B2: first row wins), null master key and value, unmatched filler
+# rows; target has a missing key, an unknown key and a repeated key
+MASTER = pd.DataFrame({
+    KEY: ["A1", "B2", "B2", "C3", None, "E5"] + [f"K{i}" for i in range(20)],
+    LOOKUP: ["X", "D", "X", None, "D", "0"] + ["X"] * 20,
+})
+TARGET = pd.DataFrame({
+    KEY: ["A1", "B2", "C3", "ZZ", None, "E5", "A1"],
+    "QTY": [1, 2, 3, 4, 5, 6, 7],
+})
+EXPECTED_STATUS = ["X", "D", "0", "NOT_FOUND", "MISSING_KEY", "0", "X"]
+EXPECTED_POSITIONS = [0, 1, 2, -1, -1, 3, 0]  # among the non-null unique master keys
+
+
+def with_key_dtype(df, dtype):
+    """Copy of a fixture with its key column stored as dtype"""
+    df = df.copy()
+    df[KEY] = df[KEY].astype(dtype)
+    return df
+
+
+class LookupEngineTests(unittest.TestCase):
+
+    def run_lookup(self, key_dtype, env=None, cached_table=False):
+        master = with_key_dtype(MASTER, key_dtype)
+        target = with_key_dtype(TARGET, key_dtype)
+        lookup_table = DataProcessor.build_lookup_table(master, KEY, LOOKUP) if cached_table else None
+        with mock.patch.dict(os.environ, env or {}):
+            return DataProcessor.add_activation_status(master, target, KEY, LOOKUP, lookup_table=lookup_table)
+
+    def assert_expected(self, result, stats):
+        self.assertEqual(list(result.columns), [KEY, "ACTIVATION_STATUS", "QTY"])
+        self.assertEqual(result["ACTIVATION_STATUS"].tolist(), EXPECTED_STATUS)
+        self.assertEqual(result["QTY"].tolist(), TARGET["QTY"].tolist())
+        self.assertEqual(stats["master_records"], len(MASTER))
+        self.assertEqual(stats["master_unique_records"], len(MASTER) - 1)
+        self.assertEqual(stats["duplicates_removed"], 1)
+        self.assertEqual(stats["mapping_results"], {"X": 2, "0": 2, "D": 1, "NOT_FOUND": 1, "MISSING_KEY": 1})
+        self.assertEqual(stats["total_processed"], len(TARGET))
+
+    def test_pandas_engine(self):
+        self.assert_expected(*self.run_lookup(object))
+
+    def test_pandas_engine_with_cached_table(self):
+        self.assert_expected(*self.run_lookup(object, cached_table=True))
+
+    def test_pandas_engine_with_categorical_keys(self):
+        self.assert_expected(*self.run_lookup("category"))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_arrow_engine(self):
+        self.assert_expected(*self.run_lookup("string[pyarrow]"))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_arrow_engine_with_cached_table(self):
+        self.assert_expected(*self.run_lookup("string[pyarrow]", cached_table=True))
+
+    @unittest.skipUnless(POLARS_AVAILABLE, "polars is not installed")
+    def test_polars_engine(self):
+        self.assert_expected(*self.run_lookup(object, env={"ETL_ENGINE": "polars"}))
+
+    @unittest.skipUnless(POLARS_AVAILABLE and PYARROW_AVAILABLE, "polars or pyarrow is not installed")
+    def test_polars_engine_with_arrow_keys(self):
+        self.assert_expected(*self.run_lookup("string[pyarrow]", env={"ETL_ENGINE": "polars"}))
+
+    def test_engines_agree_on_positions(self):
+        table = DataProcessor.build_lookup_table(MASTER, KEY, LOOKUP)
+        # Object keys: pandas 3 would otherwise store the fixture's text as Arrow strings
+        lookup_keys, target_keys = table["keys"].astype(object), TARGET[KEY].astype(object)
+        engines = {"pandas": preprocessing._lookup_positions(lookup_keys, target_keys)}
+        if PYARROW_AVAILABLE:
+            engines["arrow"] = preprocessing._lookup_positions(
+                lookup_keys.astype("string[pyarrow]"), target_keys.astype("string[pyarrow]")
+            )
+        if POLARS_AVAILABLE:
+            # Called directly so a silent fallback to pandas cannot hide a Polars failure
+            engines["polars"] = preprocessing._lookup_positions_polars(lookup_keys, target_keys)
+        for name, positions in engines.items():
+            self.assertIsNotNone(positions, name)
+            np.testing.assert_array_equal(positions, EXPECTED_POSITIONS, err_msg=name)
+
+    def test_polars_threshold_selects_polars(self):
+        table = DataProcessor.build_lookup_table(MASTER, KEY, LOOKUP)
+        with mock.patch.object(preprocessing, "POLARS_MIN_ROWS", 1), \
+                mock.patch.object(preprocessing, "_lookup_positions_polars", return_value=None) as polars_probe:
+            positions = preprocessing._lookup_positions(table["keys"].astype(object), TARGET[KEY].astype(object))
+        polars_probe.assert_called_once()
+        np.testing.assert_array_equal(positions, EXPECTED_POSITIONS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for backend.core.master_updater (Master BOM updates from activation statuses)
+"""
+import logging
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.core.master_updater import MasterBOMUpdater
+
+logging.disable(logging.CRITICAL)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+KEY = "YAZAKI PN"
+
+# Duplicate master key B2 (only its first row is updated); target repeats N1 (inserted once,
+# then a duplicate of the pending insert), has a missing key and a key already in the master
+MASTER = pd.DataFrame({
+    KEY: ["A1", "B2", "B2", "C3"],
+    "STATUS": ["X", "X", "X", "X"],
+    "DESC": ["a", "b", "b2", "c"],
+})
+TARGET = pd.DataFrame({
+    KEY: ["A1", "B2", "N1", "N1", None, "C3", "Q9", "B2"],
+    "ACTIVATION_STATUS": ["X", "D", "0", "0", "0", "0", "NOT_FOUND", "D"],
+    "QTY": [1, 2, 3, 4, 5, 6, 7, 8],
+})
+
+
+class ProcessUpdatesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.master = MASTER.copy()
+        self.target = TARGET.copy()
+        self.updated, self.stats = MasterBOMUpdater.process_updates(self.master, self.target, "STATUS")
+
+    def test_updated_master(self):
+        self.assertEqual(list(self.updated.columns), list(MASTER.columns))
+        self.assertEqual(list(self.updated.index), list(range(7)))
+        rows = [[None if pd.isna(v) else v for v in row] for row in self.updated.to_numpy(dtype=object).tolist()]
+        self.assertEqual(rows, [
+            ["A1", "X", "a"],
+            ["B2", "D", "b"],
+            ["B2", "X", "b2"],
+            ["C3", "X", "c"],
+            ["N1", "", ""],
+            [None, "", ""],
+            ["Q9", "", ""],
+        ])
+
+    def test_counts(self):
+        self.assertEqual(self.stats["updated_count"], 2)
+        self.assertEqual(self.stats["inserted_count"], 3)
+        self.assertEqual(self.stats["duplicates_count"], 2)
+        self.assertEqual(self.stats["skipped_count"], 1)
+
+    def test_duplicates(self):
+        self.assertEqual([d["YAZAKI_PN"] for d in self.stats["duplicates"]], ["N1", "C3"])
+        pending, existing = self.stats["duplicates"]
+        # A repeat of a key inserted earlier in the batch reports the pending insert
+        self.assertEqual(pending["Master_Record"], {KEY: "N1", "STATUS": "", "DESC": ""})
+        self.assertEqual(existing["Master_Record"], {KEY: "C3", "STATUS": "X", "DESC": "c"})
+        self.assertEqual(existing["Target_Record"], {KEY: "C3", "ACTIVATION_STATUS": "0", "QTY": 6})
+
+    def test_inputs_are_not_mutated(self):
+        pd.testing.assert_frame_equal(self.master, MASTER)
+        pd.testing.assert_frame_equal(self.target, TARGET)
+
+    def test_missing_status_column(self):
+        with self.assertRaises(ValueError):
+            MasterBOMUpdater.process_updates(MASTER, TARGET.drop(columns="ACTIVATION_STATUS"), "STATUS")
+
+    def test_key_dtypes_agree(self):
+        for dtype in (object, "category") + (("string[pyarrow]",) if PYARROW_AVAILABLE else ()):
+            with self.subTest(dtype=dtype):
+                master = MASTER.astype({KEY: dtype})
+                target = TARGET.astype({KEY: dtype})
+                updated, stats = MasterBOMUpdater.process_updates(master, target, "STATUS")
+                np.testing.assert_array_equal(updated["STATUS"].to_numpy(dtype=object),
+                                              self.updated["STATUS"].to_numpy(dtype=object))
+                self.assertEqual({k: v for k, v in stats.items() if k != "duplicates"},
+                                 {k: v for k, v in self.stats.items() if k != "duplicates"})
+
+
+if __name__ == "__main__":
+    unittest.main()
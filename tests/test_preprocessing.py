@@ -0,0 +1,148 @@
+"""
+Tests for column suggestion in backend.core.preprocessing
+
+Run from the project root: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import random
+import unittest
+from difflib import SequenceMatcher
+from unittest import mock
+
+from backend.core import preprocessing
+from backend.core.preprocessing import DataProcessor
+
+
+def reference_suggest_column(input_name, columns):
+    """The original (pre-optimization) difflib implementation of suggest_column"""
+    if not input_name.strip():
+        return columns[0] if columns else "", 0.0
+    parts = input_name.split('_')
+    if len(parts) >= 4:
+        prefix = '_'.join(parts[:3])
+        suffix = parts[-1]
+        best, best_score = input_name, 0
+        for col in columns:
+            if col.upper().startswith(prefix.upper()) and col.upper().endswith(suffix.upper()):
+                score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
+                if score >= 0.9 and score > best_score:
+                    best, best_score = col, score
+        if best_score > 0:
+            return best, best_score
+    best, best_score = input_name, 0
+    for col in columns:
+        score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
+        if score > best_score:
+            best, best_score = col, score
+    return best, best_score
+
+
+def random_columns(rng, count):
+    """Column names built from the tokens real BOM headers are made of (unique case-insensitively)"""
+    tokens = ["J74", "V710", "B2", "PP", "YOTK", "QTY", "STATUS", "A", "X1", "B"]
+    names = {}
+    while len(names) < count:
+        name = "_".join(rng.choice(tokens) for _ in range(rng.randint(1, 5)))
+        names.setdefault(name.lower(), name)
+    return list(names.values())
+
+
+class SuggestColumnTests:
+    """Behaviour shared by both similarity back-ends (mixed into the classes below)"""
+
+    rapidfuzz = None
+    columns = ["YAZAKI PN", "J74_V710_B2_PP_YOTK", "J74_V710_B2_QTY_YOTK", "Description", "Status"]
+
+    def setUp(self):
+        patcher = mock.patch.object(preprocessing, "RAPIDFUZZ_AVAILABLE", self.rapidfuzz)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Suggestions are memoized without regard to the back-end
+        DataProcessor._suggest_column_cached.cache_clear()
+        self.addCleanup(DataProcessor._suggest_column_cached.cache_clear)
+
+    def test_blank_input_returns_first_column(self):
+        self.assertEqual(DataProcessor.suggest_column("  ", self.columns), ("YAZAKI PN", 0.0))
+        self.assertEqual(DataProcessor.suggest_column("", []), ("", 0.0))
+
+    def test_exact_match(self):
+        self.assertEqual(DataProcessor.suggest_column("Status", self.columns), ("Status", 1.0))
+
+    def test_exact_match_is_preferred_over_an_earlier_case_variant(self):
+        self.assertEqual(DataProcessor.suggest_column("STATUS", ["status", "STATUS"]), ("STATUS", 1.0))
+
+    def test_case_insensitive_match_returns_first_variant(self):
+        self.assertEqual(DataProcessor.suggest_column("status", ["STATUS", "Status"]), ("STATUS", 1.0))
+
+    def test_prefix_and_suffix_match(self):
+        column, score = DataProcessor.suggest_column("J74_V710_B2_PP_YOTKS", self.columns + ["J74_V710_B2_PP_YOTKS_X"])
+        self.assertEqual(column, "J74_V710_B2_PP_YOTK")
+        self.assertGreaterEqual(score, 0.9)
+
+    def test_prefix_and_suffix_below_threshold_falls_back(self):
+        # Only candidate with the prefix and suffix scores below 0.9; the general scan decides
+        columns = ["J74_V710_B2_SOMETHING_ELSE_ENTIRELY_YOTK", "J74_V710_B2_P_YOTK"]
+        column, score = DataProcessor.suggest_column("J74_V710_B2_PP_YOTK", columns)
+        self.assertEqual(column, "J74_V710_B2_P_YOTK")
+        self.assertLess(score, 1.0)
+
+    def test_fallback_similarity(self):
+        column, score = DataProcessor.suggest_column("Descriptoin", self.columns)
+        self.assertEqual(column, "Description")
+        self.assertGreater(score, 0.5)
+
+    def test_no_similarity_returns_input(self):
+        self.assertEqual(DataProcessor.suggest_column("zzz", ["abc", "def"]), ("zzz", 0))
+
+    def test_accepts_any_sequence_of_columns(self):
+        self.assertEqual(
+            DataProcessor.suggest_column("Status", self.columns),
+            DataProcessor.suggest_column("Status", tuple(self.columns))
+        )
+
+
+class DifflibSuggestColumnTests(SuggestColumnTests, unittest.TestCase):
+    rapidfuzz = False
+
+    def test_matches_original_implementation(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            columns = random_columns(rng, rng.randint(1, 12))
+            input_name = rng.choice([
+                rng.choice(columns),
+                rng.choice(columns).lower(),
+                "_".join(random_columns(rng, rng.randint(1, 5))),
+            ])
+            DataProcessor._suggest_column_cached.cache_clear()
+            self.assertEqual(
+                DataProcessor.suggest_column(input_name, columns),
+                reference_suggest_column(input_name, columns),
+                msg=f"{input_name!r} in {columns!r}"
+            )
+
+
+@unittest.skipUnless(preprocessing.RAPIDFUZZ_AVAILABLE, "rapidfuzz is not installed")
+class RapidFuzzSuggestColumnTests(SuggestColumnTests, unittest.TestCase):
+    rapidfuzz = True
+
+    def test_score_scale_differs_from_difflib(self):
+        # RapidFuzz's ratio is the normalized Indel (LCS) similarity, never below difflib's
+        # ratio; the two can therefore pick different columns for weak matches
+        columns = ["B2_QTY_A_STATUS_B2_V710", "B2_J74_YOTK"]
+        column, score = DataProcessor.suggest_column("B_V710_X1_B2", columns)
+        self.assertEqual(column, "B2_J74_YOTK")
+        self.assertAlmostEqual(score, 8 / 23)
+        self.assertEqual(reference_suggest_column("B_V710_X1_B2", columns)[0], "B2_QTY_A_STATUS_B2_V710")
+
+    def test_scores_are_at_least_difflib_scores(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            columns = random_columns(rng, rng.randint(1, 8))
+            input_name = "_".join(random_columns(rng, rng.randint(1, 4)))
+            DataProcessor._suggest_column_cached.cache_clear()
+            _, score = DataProcessor.suggest_column(input_name, columns)
+            _, reference_score = reference_suggest_column(input_name, columns)
+            self.assertGreaterEqual(score, reference_score - 1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()